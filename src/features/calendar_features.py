@@ -5,6 +5,7 @@ import numpy as np
 from typing import List, Dict
 from datetime import datetime
 
+from src.features.pandas_options import with_feature_options
 from src.utils import logger
 
 
@@ -202,7 +203,7 @@ def calculate_volatility_regime(
             'volatility_regime': regime
         }, index=group.index)
     
-    vol_df = df.groupby('symbol').apply(classify_vol_regime).reset_index(level=0, drop=True)
+    vol_df = df.groupby('symbol', observed=True).apply(classify_vol_regime).reset_index(level=0, drop=True)
     df = pd.concat([df, vol_df], axis=1)
     
     # One-hot encode regime
@@ -261,6 +262,7 @@ def add_summer_indicator(
     return df
 
 
+@with_feature_options
 def calculate_all_calendar_features(
     df: pd.DataFrame,
     config: dict = None
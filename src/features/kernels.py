@@ -0,0 +1,390 @@
+"""Numba kernels for grouped time-series features.
+
+The kernels work on flat NumPy arrays plus integer group codes (as returned
+by ``pd.factorize``), keeping one running state per group. Rows do not need
+to be sorted by group; within a group they are processed in array order,
+matching ``df.groupby(...).transform`` semantics.
+"""
+
+import math
+import bottleneck as bn
+import numpy as np
+import pandas as pd
+from numba import njit
+
+
+def get_group_codes(keys: pd.Series) -> tuple:
+    """
+    Factorize group keys into integer codes for the kernels.
+    
+    Categorical keys reuse their existing codes, so the pipeline factorizes
+    the symbol column only once.
+    
+    Args:
+        keys: Group key column (e.g. symbol)
+        
+    Returns:
+        (codes, n_groups) where missing keys are coded -1
+    """
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        return keys.cat.codes.to_numpy(dtype=np.int64), len(keys.cat.categories)
+    
+    codes, uniques = pd.factorize(keys, sort=False)
+    return codes.astype(np.int64), len(uniques)
+
+
+def _group_positions(sorted_codes: np.ndarray) -> np.ndarray:
+    """Position of each row within its group, for group-sorted codes."""
+    index = np.arange(len(sorted_codes))
+    if not len(index):
+        return index
+    
+    # Start of each row's group: the last code change at or before the row
+    is_start = np.r_[True, sorted_codes[1:] != sorted_codes[:-1]]
+    group_start = np.maximum.accumulate(np.where(is_start, index, 0))
+    return index - group_start
+
+
+def compute_multi_sma(
+    values: np.ndarray,
+    codes: np.ndarray,
+    windows,
+    order: np.ndarray = None
+) -> np.ndarray:
+    """
+    Simple moving averages for several windows from one cumulative sum.
+    
+    A window needs `window` non-missing values, as with
+    ``rolling(window, min_periods=window).mean()``.
+    
+    Args:
+        values: Input values
+        codes: Group code per row (-1 for rows outside any group)
+        windows: Window sizes
+        order: Precomputed ``np.argsort(codes, kind='stable')`` (optional)
+        
+    Returns:
+        Array of shape (len(windows), len(values))
+    """
+    if order is None:
+        order = np.argsort(codes, kind='stable')
+    
+    sorted_codes = codes[order]
+    sorted_values = values[order].astype(np.float64)
+    n = len(sorted_values)
+    
+    missing = np.isnan(sorted_values)
+    csum = np.concatenate(([0.0], np.cumsum(np.where(missing, 0.0, sorted_values))))
+    cmissing = np.concatenate(([0], np.cumsum(missing)))
+    
+    position = _group_positions(sorted_codes)
+    end = np.arange(1, n + 1)
+    
+    out = np.empty((len(windows), n))
+    for k, window in enumerate(windows):
+        start = np.maximum(end - window, 0)
+        
+        result = (csum[end] - csum[start]) / window
+        incomplete = (position < window - 1) | (cmissing[end] - cmissing[start] > 0) | (sorted_codes < 0)
+        result[incomplete] = np.nan
+        
+        out[k, order] = result
+    
+    return out
+
+
+def grouped_shift(
+    values: np.ndarray,
+    codes: np.ndarray,
+    periods,
+    order: np.ndarray = None,
+    ffill: bool = False
+) -> np.ndarray:
+    """
+    Values shifted by several periods within groups, in one pass.
+    
+    Args:
+        values: Input values
+        codes: Group code per row (-1 for rows outside any group)
+        periods: Positive shift periods
+        order: Precomputed ``np.argsort(codes, kind='stable')`` (optional)
+        ffill: Forward-fill missing values within each group first, as
+            ``pct_change`` does by default
+        
+    Returns:
+        Array of shape (len(periods), len(values)); when ffill is True the
+        filled values are returned as an extra last row
+    """
+    if order is None:
+        order = np.argsort(codes, kind='stable')
+    
+    sorted_codes = codes[order]
+    sorted_values = values[order].astype(np.float64)
+    n = len(sorted_values)
+    
+    position = _group_positions(sorted_codes)
+    
+    if ffill:
+        # Index of the last valid row so far, not reaching into the previous group
+        last_valid = np.where(~np.isnan(sorted_values), np.arange(n), -1)
+        last_valid = np.maximum.accumulate(last_valid) if n else last_valid
+        group_start = np.arange(n) - position
+        filled = np.where(last_valid >= group_start, sorted_values[np.maximum(last_valid, 0)], np.nan)
+        sorted_values = filled
+    
+    rows = list(periods) + ([0] if ffill else [])
+    out = np.empty((len(rows), n))
+    for k, period in enumerate(rows):
+        result = sorted_values[np.maximum(np.arange(n) - period, 0)]
+        result[(position < period) | (sorted_codes < 0)] = np.nan
+        out[k, order] = result
+    
+    return out
+
+
+def grouped_moving(
+    values: np.ndarray,
+    codes: np.ndarray,
+    window: int,
+    move_func,
+    order: np.ndarray = None,
+    **kwargs
+) -> np.ndarray:
+    """
+    Apply a bottleneck moving-window function within groups.
+    
+    Rows are stably sorted by group so each group is contiguous, the
+    moving function runs once over the whole array, and windows that reach
+    back into the previous group are masked out. Equivalent to
+    ``groupby(codes).transform(lambda x: x.rolling(window, min_periods=window).<agg>())``.
+    
+    Args:
+        values: Input values
+        codes: Group code per row (-1 for rows outside any group)
+        window: Window size
+        move_func: bottleneck moving function (e.g. ``bn.move_mean``)
+        order: Precomputed ``np.argsort(codes, kind='stable')`` to reuse
+            across calls (default: computed here)
+        **kwargs: Extra arguments for ``move_func`` (e.g. ``ddof=1``)
+        
+    Returns:
+        Array of results in the original row order
+    """
+    if order is None:
+        order = np.argsort(codes, kind='stable')
+    
+    sorted_codes = codes[order]
+    sorted_values = np.ascontiguousarray(values[order], dtype=np.float64)
+    
+    result = move_func(sorted_values, window, min_count=window, **kwargs)
+    
+    position = _group_positions(sorted_codes)
+    result[(position < window - 1) | (sorted_codes < 0)] = np.nan
+    
+    out = np.empty_like(result)
+    out[order] = result
+    
+    return out
+
+
+def grouped_rolling_mean(
+    values: np.ndarray,
+    codes: np.ndarray,
+    window: int,
+    order: np.ndarray = None
+) -> np.ndarray:
+    """
+    Rolling mean within groups from one ``bottleneck.move_mean`` pass.
+    
+    Windows holding a single repeated value get exactly that value, as
+    pandas rolling does: a running sum leaves round-off residue (e.g. 1e-10
+    instead of 0 after a run of zero-volume days follows large values).
+    
+    Args:
+        values: Input values
+        codes: Group code per row (-1 for rows outside any group)
+        window: Window size (also the minimum number of observations)
+        order: Precomputed ``np.argsort(codes, kind='stable')`` (optional)
+        
+    Returns:
+        Array of rolling means in the original row order
+    """
+    if order is None:
+        order = np.argsort(codes, kind='stable')
+    
+    mean = grouped_moving(values, codes, window, bn.move_mean, order=order)
+    
+    # Length of the run of equal values ending at each row (NaN breaks runs)
+    sorted_values = values[order]
+    n = len(sorted_values)
+    index = np.arange(n)
+    run_start = np.zeros(n, dtype=np.int64)
+    if n:
+        breaks = np.r_[True, sorted_values[1:] != sorted_values[:-1]]
+        run_start = np.maximum.accumulate(np.where(breaks, index, 0))
+    
+    flat = np.zeros(n, dtype=bool)
+    flat[order] = index - run_start + 1 >= window
+    flat &= ~np.isnan(mean)
+    mean[flat] = values[flat]
+    
+    return mean
+
+
+def grouped_rolling_mean_std(
+    values: np.ndarray,
+    codes: np.ndarray,
+    window: int,
+    order: np.ndarray = None
+) -> tuple:
+    """
+    Rolling mean and sample standard deviation within groups.
+    
+    Windows holding a single repeated value get exactly that value as mean
+    and zero spread, as pandas rolling does, instead of running-sum
+    round-off (flat stretches are common for illiquid names).
+    
+    Args:
+        values: Input values
+        codes: Group code per row (-1 for rows outside any group)
+        window: Window size (also the minimum number of observations)
+        order: Precomputed ``np.argsort(codes, kind='stable')`` (optional)
+        
+    Returns:
+        (mean, std) arrays in the original row order
+    """
+    if order is None:
+        order = np.argsort(codes, kind='stable')
+    
+    mean = grouped_moving(values, codes, window, bn.move_mean, order=order)
+    std = grouped_moving(values, codes, window, bn.move_std, order=order, ddof=1)
+    
+    flat = (
+        grouped_moving(values, codes, window, bn.move_max, order=order)
+        == grouped_moving(values, codes, window, bn.move_min, order=order)
+    )
+    mean[flat] = values[flat]
+    std[flat] = 0.0
+    
+    return mean, std
+
+
+@njit(cache=True)
+def _grouped_ema_kernel(x, codes, n_groups, alphas):
+    n = x.shape[0]
+    k = alphas.shape[0]
+    out = np.empty((k, n))
+    
+    weighted = np.full((k, n_groups), np.nan)
+    old_wt = np.ones((k, n_groups))
+    seen = np.zeros(n_groups, dtype=np.bool_)
+    
+    for i in range(n):
+        g = codes[i]
+        if g < 0:
+            for j in range(k):
+                out[j, i] = np.nan
+            continue
+        
+        cur = x[i]
+        is_obs = not math.isnan(cur)
+        
+        if not seen[g]:
+            seen[g] = True
+            for j in range(k):
+                weighted[j, g] = cur
+                old_wt[j, g] = 1.0
+                out[j, i] = cur
+            continue
+        
+        for j in range(k):
+            w = weighted[j, g]
+            if not math.isnan(w):
+                # Same recurrence as pandas ewm(adjust=False, ignore_na=False):
+                # gaps decay the old weight before the next observation
+                old_wt[j, g] *= 1.0 - alphas[j]
+                if is_obs:
+                    if w != cur:
+                        weighted[j, g] = (old_wt[j, g] * w + alphas[j] * cur) / (old_wt[j, g] + alphas[j])
+                    old_wt[j, g] = 1.0
+            elif is_obs:
+                weighted[j, g] = cur
+            out[j, i] = weighted[j, g]
+    
+    return out
+
+
+def grouped_ema(
+    values: np.ndarray,
+    codes: np.ndarray,
+    n_groups: int,
+    spans
+) -> np.ndarray:
+    """
+    Exponential moving averages for several spans in a single pass.
+    
+    Equivalent to ``groupby(codes).transform(lambda x: x.ewm(span=s, adjust=False).mean())``
+    for each span, including the handling of missing values.
+    
+    Args:
+        values: Input values
+        codes: Group code per row (-1 for rows outside any group)
+        n_groups: Number of groups
+        spans: EMA spans
+        
+    Returns:
+        Array of shape (len(spans), len(values))
+    """
+    alphas = 2.0 / (np.asarray(spans, dtype=np.float64) + 1.0)
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    return _grouped_ema_kernel(values, codes, n_groups, alphas)
+
+
+class OnlineEMA:
+    """
+    Streaming exponential moving average, updated one observation at a time.
+    
+    Produces the same values as ``Series.ewm(span=span, adjust=False).mean()``
+    evaluated on the full history, e.g. for intraday updates.
+    """
+    
+    def __init__(self, span: float):
+        """
+        Initialize online EMA.
+        
+        Args:
+            span: EMA span (alpha = 2 / (span + 1))
+        """
+        if span < 1:
+            raise ValueError(f"span must be >= 1, got {span}")
+        
+        self.alpha = 2.0 / (span + 1.0)
+        self.value = np.nan
+        self._old_wt = 1.0
+        self._started = False
+    
+    def update(self, x: float) -> float:
+        """
+        Add an observation and return the updated average.
+        
+        Args:
+            x: New observation (NaN counts as a missing period)
+            
+        Returns:
+            Current EMA value
+        """
+        is_obs = not math.isnan(x)
+        
+        if not self._started:
+            self._started = True
+            self.value = x
+        elif not math.isnan(self.value):
+            self._old_wt *= 1.0 - self.alpha
+            if is_obs:
+                if self.value != x:
+                    self.value = (self._old_wt * self.value + self.alpha * x) / (self._old_wt + self.alpha)
+                self._old_wt = 1.0
+        elif is_obs:
+            self.value = x
+        
+        return self.value
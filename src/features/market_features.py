@@ -1,9 +1,17 @@
-"""Market context features for BVMT forecasting system."""
+"""Market context features for BVMT forecasting system.
 
+The individual helpers add columns to the DataFrame they are given in
+place; calculate_all_market_features copies its input once up front.
+"""
+
+import bottleneck as bn
+import numexpr as ne
 import pandas as pd
 import numpy as np
 from typing import Optional
 
+from src.features.kernels import get_group_codes, grouped_moving, grouped_rolling_mean_std
+from src.features.pandas_options import with_feature_options
 from src.utils import logger
 
 
@@ -13,61 +21,66 @@ def merge_market_index(
     index_column: str = 'value'
 ) -> pd.DataFrame:
     """
-    Merge market index data with stock data.
+    Attach the market index level and return to stock rows by date.
+    
+    The index is a small per-date table, so both columns are looked up by
+    date instead of merging the index frame onto every stock row.
     
     Args:
         stock_df: Stock DataFrame
-        index_df: Index DataFrame (TUNINDEX)
+        index_df: Index DataFrame (TUNINDEX), one row per date
         index_column: Index value column name
         
     Returns:
-        DataFrame with index data merged
+        Stock DataFrame with market_index and market_return columns added
     """
     # Ensure both have date column
     if 'date' not in stock_df.columns or 'date' not in index_df.columns:
         raise ValueError("Both DataFrames must have 'date' column")
     
-    # Select relevant index columns
-    index_cols = ['date', index_column]
-    if 'change_pct' in index_df.columns:
-        index_cols.append('change_pct')
+    index_by_date = index_df.drop_duplicates('date', keep='last').set_index('date')
+    market_return = calculate_market_return(index_by_date, index_column=index_column)
     
-    index_subset = index_df[index_cols].copy()
-    index_subset = index_subset.rename(columns={
-        index_column: 'market_index',
-        'change_pct': 'market_return'
-    })
+    stock_df['market_index'] = stock_df['date'].map(index_by_date[index_column])
+    stock_df['market_return'] = stock_df['date'].map(market_return)
     
-    # Merge on date
-    merged_df = stock_df.merge(index_subset, on='date', how='left')
+    # Returns computed from index levels: trading dates without an index
+    # print count as an unchanged market, as padding the level would give.
+    # Reported change_pct values are used as they are; a missing one stays
+    # NaN rather than becoming a made-up zero return
+    first_return_date = market_return.first_valid_index()
+    if 'change_pct' not in index_by_date.columns and first_return_date is not None:
+        uncovered = stock_df['market_return'].isna() & (stock_df['date'] > first_return_date)
+        stock_df.loc[uncovered, 'market_return'] = 0.0
     
     logger.debug(f"Merged market index data")
     
-    return merged_df
+    return stock_df
 
 
 def calculate_market_return(
-    df: pd.DataFrame,
-    index_column: str = 'market_index'
-) -> pd.DataFrame:
+    index_df: pd.DataFrame,
+    index_column: str = 'value'
+) -> pd.Series:
     """
-    Calculate market returns if not already present.
+    Calculate daily market returns on the index table.
+    
+    Uses the reported change_pct column when present, otherwise the
+    percentage change between consecutive index values.
     
     Args:
-        df: DataFrame with market index
+        index_df: Index DataFrame indexed by date
         index_column: Index value column name
         
     Returns:
-        DataFrame with market return column added
+        Series of market returns indexed by date
     """
-    df = df.copy()
+    if 'change_pct' in index_df.columns:
+        return index_df['change_pct']
     
-    if 'market_return' not in df.columns:
-        # Ensure index is numeric
-        market_idx = pd.to_numeric(df[index_column], errors='coerce')
-        df['market_return'] = market_idx.pct_change()
+    market_idx = index_df[index_column].sort_index().dropna()
     
-    return df
+    return market_idx.pct_change()
 
 
 def calculate_relative_strength(
@@ -86,19 +99,57 @@ def calculate_relative_strength(
     Returns:
         DataFrame with relative strength column added
     """
-    df = df.copy()
-    
-    # Ensure returns are numeric
-    stock_ret = pd.to_numeric(df[stock_return_column], errors='coerce')
-    market_ret = pd.to_numeric(df[market_return_column], errors='coerce')
-    
-    df['relative_strength'] = stock_ret - market_ret
+    df['relative_strength'] = df[stock_return_column] - df[market_return_column]
     
     logger.debug(f"Calculated relative strength")
     
     return df
 
 
+def _rolling_covariance(
+    df: pd.DataFrame,
+    window: int,
+    stock_return_column: str,
+    market_return_column: str
+) -> tuple:
+    """
+    Per-symbol rolling covariance of stock and market returns.
+    
+    Follows pandas rolling cov/corr: only rows where both returns are
+    present count, and a window needs `window` such rows.
+    
+    Args:
+        df: DataFrame with stock and market returns
+        window: Rolling window size
+        stock_return_column: Stock return column name
+        market_return_column: Market return column name
+        
+    Returns:
+        (cov, stock_std, market_std, codes, order) arrays in row order
+    """
+    codes, _ = get_group_codes(df['symbol'])
+    order = np.argsort(codes, kind='stable')
+    
+    stock = df[stock_return_column].to_numpy(dtype=np.float64)
+    market = df[market_return_column].to_numpy(dtype=np.float64)
+    
+    # Pairwise-complete observations
+    missing = np.isnan(stock) | np.isnan(market)
+    stock = np.where(missing, np.nan, stock)
+    market = np.where(missing, np.nan, market)
+    
+    mean_stock, std_stock = grouped_rolling_mean_std(stock, codes, window, order=order)
+    mean_market, std_market = grouped_rolling_mean_std(market, codes, window, order=order)
+    mean_cross = grouped_moving(stock * market, codes, window, bn.move_mean, order=order)
+    
+    cov = (mean_cross - mean_stock * mean_market) * (window / (window - 1))
+    
+    # A flat series has no covariance with anything
+    cov[(std_stock == 0) | (std_market == 0)] = 0.0
+    
+    return cov, std_stock, std_market, codes, order
+
+
 def calculate_market_correlation(
     df: pd.DataFrame,
     window: int = 60,
@@ -117,16 +168,13 @@ def calculate_market_correlation(
     Returns:
         DataFrame with market correlation column added
     """
-    df = df.copy()
+    cov, std_stock, std_market, _, _ = _rolling_covariance(
+        df, window, stock_return_column, market_return_column
+    )
     
-    def compute_correlation(group):
-        # Calculate rolling correlation
-        corr = group[stock_return_column].rolling(window=window, min_periods=window).corr(
-            group[market_return_column]
-        )
-        return corr
-    
-    df['market_correlation'] = df.groupby('symbol').apply(compute_correlation).reset_index(level=0, drop=True)
+    # Flat windows are undefined (0/0), as with pandas rolling corr
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df['market_correlation'] = cov / (std_stock * std_market)
     
     logger.debug(f"Calculated market correlation with window {window}")
     
@@ -153,28 +201,22 @@ def calculate_beta(
     Returns:
         DataFrame with beta column added
     """
-    df = df.copy()
+    # Rolling covariance
+    cov, _, _, codes, order = _rolling_covariance(
+        df, window, stock_return_column, market_return_column
+    )
     
-    def compute_beta(group):
-        # Calculate rolling covariance and variance
-        stock_returns = group[stock_return_column]
-        market_returns = group[market_return_column]
-        
-        # Rolling covariance
-        cov = stock_returns.rolling(window=window, min_periods=window).cov(market_returns)
-        
-        # Rolling variance of market
-        market_var = market_returns.rolling(window=window, min_periods=window).var()
-        
-        # Beta
-        beta = cov / market_var
-        
-        return beta
+    # Rolling variance of market (over all market observations)
+    market = df[market_return_column].to_numpy(dtype=np.float64)
+    _, market_std = grouped_rolling_mean_std(market, codes, window, order=order)
     
-    df['beta'] = df.groupby('symbol').apply(compute_beta).reset_index(level=0, drop=True)
+    # Beta
+    with np.errstate(divide='ignore', invalid='ignore'):
+        beta = cov / market_std ** 2
     
     # Handle division by zero
-    df['beta'] = df['beta'].replace([np.inf, -np.inf], np.nan)
+    np.copyto(beta, np.nan, where=np.isinf(beta))
+    df['beta'] = beta
     
     logger.debug(f"Calculated beta with window {window}")
     
@@ -197,15 +239,17 @@ def calculate_market_cap_proxy(
     Returns:
         DataFrame with market cap proxy column added
     """
-    df = df.copy()
-    
-    df['market_cap_proxy'] = df[price_column] * df[volume_column]
+    # Single multithreaded pass straight on the column buffers
+    price = df[price_column].to_numpy()
+    volume = df[volume_column].to_numpy()
+    df['market_cap_proxy'] = ne.evaluate('price * volume')
     
     logger.debug(f"Calculated market cap proxy")
     
     return df
 
 
+@with_feature_options
 def calculate_all_market_features(
     stock_df: pd.DataFrame,
     index_df: Optional[pd.DataFrame] = None,
@@ -227,23 +271,13 @@ def calculate_all_market_features(
     if config is None:
         config = {}
     
-    # Merge index data if provided
+    # Single defensive (copy-on-write) copy; the helpers below mutate it in place
+    stock_df = stock_df.copy(deep=False)
+    
+    # Merge index data if provided (numeric dtypes are enforced at load time)
     if index_df is not None:
         stock_df = merge_market_index(stock_df, index_df)
         
-        # Enforce numeric types for market index and returns
-        if 'market_index' in stock_df.columns:
-            stock_df['market_index'] = pd.to_numeric(stock_df['market_index'], errors='coerce')
-            
-        stock_df = calculate_market_return(stock_df)
-        
-        # Enforce numeric types for returns
-        if 'market_return' in stock_df.columns:
-            stock_df['market_return'] = pd.to_numeric(stock_df['market_return'], errors='coerce')
-            
-        if 'log_return' in stock_df.columns:
-            stock_df['log_return'] = pd.to_numeric(stock_df['log_return'], errors='coerce')
-        
         # Relative strength
         stock_df = calculate_relative_strength(stock_df)
         
@@ -257,12 +291,6 @@ def calculate_all_market_features(
         logger.warning("No index data provided, skipping market features")
     
     # Market cap proxy
-    # Ensure inputs are numeric
-    if 'close' in stock_df.columns:
-        stock_df['close'] = pd.to_numeric(stock_df['close'], errors='coerce')
-    if 'volume' in stock_df.columns:
-        stock_df['volume'] = pd.to_numeric(stock_df['volume'], errors='coerce')
-        
     stock_df = calculate_market_cap_proxy(stock_df)
     
     logger.info(f"✓ Market features complete")
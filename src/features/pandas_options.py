@@ -0,0 +1,42 @@
+"""pandas options the feature code is written for.
+
+The options are applied around the feature entry points with
+``pd.option_context`` rather than set globally at import, so importing
+``src.features`` leaves pandas' behavior unchanged for everything else
+in the process.
+"""
+
+import functools
+from typing import Callable, TypeVar
+
+import pandas as pd
+
+
+F = TypeVar('F', bound=Callable)
+
+# Reductions through bottleneck/numexpr when available; copy-on-write so
+# derived frames share column buffers until one is modified, and defensive
+# copies in the feature helpers cost O(columns), not O(data)
+FEATURE_PANDAS_OPTIONS = (
+    'compute.use_bottleneck', True,
+    'compute.use_numexpr', True,
+    'mode.copy_on_write', True
+)
+
+
+def with_feature_options(func: F) -> F:
+    """
+    Run func with FEATURE_PANDAS_OPTIONS set, restoring the caller's options after.
+    
+    Args:
+        func: Feature entry point
+        
+    Returns:
+        Wrapped function
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with pd.option_context(*FEATURE_PANDAS_OPTIONS):
+            return func(*args, **kwargs)
+    
+    return wrapper
@@ -1,6 +1,12 @@
 """Feature engineering pipeline orchestrator."""
 
+import os
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 from typing import Optional
 import sys
@@ -12,9 +18,33 @@ from src.features.price_features import calculate_all_price_features
 from src.features.volume_features import calculate_all_volume_features
 from src.features.market_features import calculate_all_market_features
 from src.features.calendar_features import calculate_all_calendar_features
+from src.features.pandas_options import with_feature_options
 from src.utils import logger, config
 
 
+# Index columns used by the market features; the rest of the index file is skipped
+INDEX_COLUMNS = ['date', 'value', 'change_pct']
+
+# Columns coerced to numeric once at load so feature code can trust their dtypes
+STOCK_NUMERIC_COLUMNS = ['open', 'high', 'low', 'close', 'adj_close', 'volume', 'turnover', 'num_trades']
+INDEX_NUMERIC_COLUMNS = ['value', 'change_pct']
+
+
+# Index data shared read-only with pool workers (set once per worker by the initializer)
+_worker_index_df = None
+
+
+def _init_worker(index_df: Optional[pd.DataFrame]) -> None:
+    """Store the index DataFrame in the worker so it is pickled once, not per task."""
+    global _worker_index_df
+    _worker_index_df = index_df
+
+
+def _process_symbol_in_worker(symbol_df: pd.DataFrame, config_dict: dict) -> pd.DataFrame:
+    """Pool task: engineer features for one symbol using the worker's index data."""
+    return FeaturePipeline._process_symbol(symbol_df, _worker_index_df, config_dict)
+
+
 class FeaturePipeline:
     """Orchestrate all feature engineering steps."""
     
@@ -46,18 +76,66 @@ class FeaturePipeline:
         if not stock_path.exists():
             raise FileNotFoundError(f"Stock data not found: {stock_path}")
         
-        stock_df = pd.read_parquet(stock_path)
+        # Every stock column is carried into the feature matrix, so read them all
+        stock_df = self._read_parquet(stock_path)
+        stock_df = self.enforce_numeric(stock_df, STOCK_NUMERIC_COLUMNS)
         logger.info(f"Loaded stock data: {len(stock_df)} rows, {stock_df['symbol'].nunique()} symbols")
         
         index_df = None
         if index_path.exists():
-            index_df = pd.read_parquet(index_path)
+            index_df = self._read_parquet(index_path, columns=INDEX_COLUMNS)
+            index_df = self.enforce_numeric(index_df, INDEX_NUMERIC_COLUMNS)
             logger.info(f"Loaded index data: {len(index_df)} rows")
         else:
             logger.warning(f"Index data not found: {index_path}")
         
         return stock_df, index_df
     
+    @staticmethod
+    def _read_parquet(path: Path, columns: Optional[list] = None) -> pd.DataFrame:
+        """
+        Read a parquet file with multithreaded, memory-mapped PyArrow I/O.
+        
+        Args:
+            path: Parquet file path
+            columns: Columns to read; names missing from the file are ignored
+                (default: all columns)
+            
+        Returns:
+            DataFrame with NumPy-backed columns
+        """
+        if columns is not None:
+            available = set(pq.read_schema(path, memory_map=True).names)
+            columns = [col for col in columns if col in available]
+        
+        table = pq.read_table(path, columns=columns, use_threads=True, memory_map=True)
+        
+        return table.to_pandas()
+    
+    @staticmethod
+    def enforce_numeric(df: pd.DataFrame, columns: list) -> pd.DataFrame:
+        """
+        Coerce columns to numeric dtypes, turning unparseable values into NaN.
+        
+        Columns that are already numeric are left untouched (no copy). Values
+        stay at full precision; the float32 downcast happens once on the
+        finished feature matrix.
+        
+        Args:
+            df: Loaded DataFrame
+            columns: Columns that must be numeric (missing ones are ignored)
+            
+        Returns:
+            DataFrame with numeric columns
+        """
+        for col in columns:
+            if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
+                logger.warning(f"Column '{col}' has dtype {df[col].dtype}, coercing to numeric")
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+        
+        return df
+    
+    @with_feature_options
     def generate_features(
         self,
         stock_df: pd.DataFrame,
@@ -77,20 +155,54 @@ class FeaturePipeline:
         logger.info("Starting Feature Engineering")
         logger.info("=" * 60)
         
-        # Price features
-        stock_df = calculate_all_price_features(stock_df, self.config)
+        # Every feature is computed within a symbol, so symbols can be processed
+        # independently in worker processes
+        n_jobs = self.config.get('n_jobs') or os.cpu_count() or 1
+        if n_jobs < 0:
+            n_jobs = os.cpu_count() or 1
         
-        # Volume features
-        stock_df = calculate_all_volume_features(stock_df, self.config)
+        # Factorize symbols once: every groupby('symbol') and Numba kernel
+        # downstream reuses the categorical codes instead of re-hashing strings
+        if not isinstance(stock_df['symbol'].dtype, pd.CategoricalDtype):
+            stock_df = stock_df.assign(symbol=stock_df['symbol'].astype('category'))
         
-        # Market features
-        stock_df = calculate_all_market_features(stock_df, index_df, self.config)
+        # Sort once so each symbol is a contiguous, chronological block: the
+        # grouped passes downstream (groupby(sort=False) and the rolling
+        # kernels) then return rows in frame order and assign without realignment
+        stock_df = stock_df.sort_values(['symbol', 'date'], kind='stable', ignore_index=True)
         
-        # Calendar features
-        stock_df = calculate_all_calendar_features(stock_df, self.config)
+        # Observed symbols only (unused categories form no group)
+        n_symbols = stock_df['symbol'].nunique()
+        n_jobs = min(n_jobs, n_symbols)
+        
+        if n_jobs <= 1:
+            stock_df = self._process_symbol(stock_df, index_df, self.config)
+        else:
+            # Per-symbol frames are only needed to ship work to the pool
+            shards = [group for _, group in stock_df.groupby('symbol', sort=False, observed=True)]
+            
+            logger.info(f"Processing {len(shards)} symbols with {n_jobs} worker processes")
+            chunksize = max(1, len(shards) // (n_jobs * 4))
+            
+            with ProcessPoolExecutor(
+                max_workers=n_jobs,
+                initializer=_init_worker,
+                initargs=(index_df,)
+            ) as executor:
+                results = list(executor.map(
+                    partial(_process_symbol_in_worker, config_dict=self.config),
+                    shards,
+                    chunksize=chunksize
+                ))
+            
+            stock_df = pd.concat(results, ignore_index=True)
         
         # Sanitize features (replace inf with nan globally)
-        stock_df = stock_df.replace([float('inf'), float('-inf')], float('nan'))
+        stock_df = self.replace_infinite(stock_df)
+        
+        # Shrink the feature matrix: float32 halves memory and parquet size,
+        # and symbol is dictionary-encoded as a categorical
+        stock_df = self.downcast_features(stock_df)
         
         logger.info("=" * 60)
         logger.info(f"Feature Engineering Complete!")
@@ -99,6 +211,121 @@ class FeaturePipeline:
         
         return stock_df
     
+    @staticmethod
+    @with_feature_options
+    def _process_symbol(
+        symbol_df: pd.DataFrame,
+        index_df: Optional[pd.DataFrame],
+        config_dict: dict
+    ) -> pd.DataFrame:
+        """
+        Run all feature stages on one symbol's rows.
+        
+        Also accepts a frame holding several whole symbols, since every
+        stage groups by symbol internally.
+        
+        Args:
+            symbol_df: Stock DataFrame for a single symbol
+            index_df: Index DataFrame (optional)
+            config_dict: Feature configuration
+            
+        Returns:
+            DataFrame with all features for the symbol
+        """
+        if config_dict.get('engine', 'pandas') == 'polars':
+            # Price and volume features as one lazy Polars plan
+            symbol_df = FeaturePipeline._price_volume_features_polars(symbol_df, config_dict)
+        else:
+            # Price features
+            symbol_df = calculate_all_price_features(symbol_df, config_dict)
+            
+            # Volume features
+            symbol_df = calculate_all_volume_features(symbol_df, config_dict)
+        
+        # Market features
+        symbol_df = calculate_all_market_features(symbol_df, index_df, config_dict)
+        
+        # Calendar features
+        symbol_df = calculate_all_calendar_features(symbol_df, config_dict)
+        
+        return symbol_df
+    
+    @staticmethod
+    def _price_volume_features_polars(df: pd.DataFrame, config_dict: dict) -> pd.DataFrame:
+        """
+        Compute price and volume features with the lazy Polars engine.
+        
+        Both stages are planned together and collected once. Falls back to
+        the pandas implementation when polars is not installed.
+        
+        Args:
+            df: Stock DataFrame
+            config_dict: Feature configuration
+            
+        Returns:
+            DataFrame with all price and volume features added
+        """
+        try:
+            import polars as pl
+            from src.features.price_features_polars import calculate_all_price_features_pl
+            from src.features.volume_features_polars import calculate_all_volume_features_pl
+        except ImportError:
+            logger.warning("polars not installed, using pandas price and volume features")
+            df = calculate_all_price_features(df, config_dict)
+            return calculate_all_volume_features(df, config_dict)
+        
+        lazy_df = pl.from_pandas(df).lazy()
+        lazy_df = calculate_all_price_features_pl(lazy_df, config_dict)
+        lazy_df = calculate_all_volume_features_pl(lazy_df, config_dict)
+        
+        return lazy_df.collect().to_pandas()
+    
+    @staticmethod
+    def replace_infinite(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Replace +/-inf with NaN in float columns.
+        
+        Only columns that actually contain infinities are rewritten; the
+        rest are checked with a single vectorized pass and left untouched.
+        
+        Args:
+            df: DataFrame with features
+            
+        Returns:
+            DataFrame with infinities replaced by NaN
+        """
+        for col in df.select_dtypes(include=[np.floating]).columns:
+            values = df[col].to_numpy()
+            inf_mask = np.isinf(values)
+            
+            if inf_mask.any():
+                values = values.copy()
+                np.copyto(values, np.nan, where=inf_mask)
+                df[col] = values
+        
+        return df
+    
+    def downcast_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Downcast feature matrix dtypes for storage and modeling.
+        
+        Args:
+            df: DataFrame with features
+            
+        Returns:
+            DataFrame with float32 features, categorical symbol and datetime date
+        """
+        float_cols = df.select_dtypes(include=['float64']).columns
+        df[float_cols] = df[float_cols].astype('float32')
+        
+        if 'symbol' in df.columns and not isinstance(df['symbol'].dtype, pd.CategoricalDtype):
+            df['symbol'] = df['symbol'].astype('category')
+        
+        if 'date' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['date']):
+            df['date'] = pd.to_datetime(df['date'])
+        
+        return df
+    
     def drop_insufficient_history(
         self,
         df: pd.DataFrame,
@@ -119,10 +346,16 @@ class FeaturePipeline:
         
         before_count = len(df)
         
-        # Drop first N rows per symbol
-        df = df.groupby('symbol').apply(
-            lambda x: x.iloc[lookback_window:]
-        ).reset_index(drop=True)
+        # Drop first N rows per symbol: once sorted, each symbol is a contiguous
+        # block, so a row's position in its group is its offset from the block start
+        df = df.sort_values(['symbol', 'date'], kind='stable', na_position='first', ignore_index=True)
+        codes, uniques = pd.factorize(df['symbol'])
+        group_start = np.searchsorted(codes, np.arange(len(uniques)))
+        
+        position = np.arange(len(df)) - group_start[codes]
+        mask = (codes >= 0) & (position >= lookback_window)
+        
+        df = df.iloc[mask].reset_index(drop=True)
         
         after_count = len(df)
         dropped = before_count - after_count
@@ -150,7 +383,16 @@ class FeaturePipeline:
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
         # Save to parquet
-        df.to_parquet(output_path, index=False)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pq.write_table(
+            table,
+            output_path,
+            compression='zstd',
+            compression_level=3,
+            use_dictionary=[col for col in ['symbol', 'name'] if col in df.columns],
+            data_page_size=1 << 20,
+            write_statistics=True
+        )
         
         logger.info(f"✓ Saved features to {output_path}")
         logger.info(f"  - Size: {output_path.stat().st_size / 1024 / 1024:.2f} MB")
@@ -165,6 +407,7 @@ class FeaturePipeline:
         
         logger.info(f"✓ Saved feature list to {feature_list_path}")
     
+    @with_feature_options
     def run(self) -> pd.DataFrame:
         """
         Run complete feature engineering pipeline.
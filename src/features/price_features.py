@@ -1,9 +1,21 @@
-"""Price-based features for BVMT forecasting system."""
+"""Price-based features for BVMT forecasting system.
+
+The individual helpers add columns to the DataFrame they are given in
+place; calculate_all_price_features copies its input once up front.
+"""
 
 import pandas as pd
 import numpy as np
 from typing import List
 
+from src.features.kernels import (
+    compute_multi_sma,
+    get_group_codes,
+    grouped_ema,
+    grouped_rolling_mean_std,
+    grouped_shift
+)
+from src.features.pandas_options import with_feature_options
 from src.utils import logger
 
 
@@ -23,13 +35,12 @@ def calculate_sma(
     Returns:
         DataFrame with SMA columns added
     """
-    df = df.copy()
+    # All windows from one cumulative sum over the price column
+    codes, _ = get_group_codes(df['symbol'])
+    smas = compute_multi_sma(df[price_column].to_numpy(dtype=np.float64), codes, periods)
     
-    for period in periods:
-        col_name = f'sma_{period}'
-        df[col_name] = df.groupby('symbol')[price_column].transform(
-            lambda x: x.rolling(window=period, min_periods=period).mean()
-        )
+    for period, sma in zip(periods, smas):
+        df[f'sma_{period}'] = sma
     
     logger.debug(f"Calculated SMA for periods: {periods}")
     
@@ -52,13 +63,12 @@ def calculate_ema(
     Returns:
         DataFrame with EMA columns added
     """
-    df = df.copy()
+    # All spans in one pass over the column
+    codes, n_groups = get_group_codes(df['symbol'])
+    emas = grouped_ema(df[price_column].to_numpy(dtype=np.float64), codes, n_groups, periods)
     
-    for period in periods:
-        col_name = f'ema_{period}'
-        df[col_name] = df.groupby('symbol')[price_column].transform(
-            lambda x: x.ewm(span=period, adjust=False).mean()
-        )
+    for period, ema in zip(periods, emas):
+        df[f'ema_{period}'] = ema
     
     logger.debug(f"Calculated EMA for periods: {periods}")
     
@@ -85,8 +95,6 @@ def calculate_rsi(
     Returns:
         DataFrame with RSI column added
     """
-    df = df.copy()
-    
     def compute_rsi(prices):
         # Calculate price changes
         delta = prices.diff()
@@ -105,7 +113,7 @@ def calculate_rsi(
         
         return rsi
     
-    df['rsi'] = df.groupby('symbol')[price_column].transform(compute_rsi)
+    df['rsi'] = df.groupby('symbol', observed=True)[price_column].transform(compute_rsi)
     
     logger.debug(f"Calculated RSI with period {period}")
     
@@ -132,30 +140,21 @@ def calculate_macd(
     Returns:
         DataFrame with MACD columns added
     """
-    df = df.copy()
+    codes, n_groups = get_group_codes(df['symbol'])
+    prices = df[price_column].to_numpy(dtype=np.float64)
     
-    def compute_macd(prices):
-        # Calculate EMAs
-        ema_fast = prices.ewm(span=fast_period, adjust=False).mean()
-        ema_slow = prices.ewm(span=slow_period, adjust=False).mean()
-        
-        # MACD line
-        macd_line = ema_fast - ema_slow
-        
-        # Signal line
-        signal_line = macd_line.ewm(span=signal_period, adjust=False).mean()
-        
-        # MACD histogram
-        macd_hist = macd_line - signal_line
-        
-        return pd.DataFrame({
-            'macd': macd_line,
-            'macd_signal': signal_line,
-            'macd_hist': macd_hist
-        })
+    # Fast and slow EMAs in one pass
+    ema_fast, ema_slow = grouped_ema(prices, codes, n_groups, [fast_period, slow_period])
     
-    macd_df = df.groupby('symbol')[price_column].apply(compute_macd).reset_index(level=0, drop=True)
-    df = pd.concat([df, macd_df], axis=1)
+    # MACD line
+    macd_line = ema_fast - ema_slow
+    
+    # Signal line
+    signal_line = grouped_ema(macd_line, codes, n_groups, [signal_period])[0]
+    
+    df['macd'] = macd_line
+    df['macd_signal'] = signal_line
+    df['macd_hist'] = macd_line - signal_line
     
     logger.debug(f"Calculated MACD ({fast_period}, {slow_period}, {signal_period})")
     
@@ -180,35 +179,27 @@ def calculate_bollinger_bands(
     Returns:
         DataFrame with Bollinger Bands columns added
     """
-    df = df.copy()
+    codes, _ = get_group_codes(df['symbol'])
+    prices = df[price_column].to_numpy(dtype=np.float64)
     
-    def compute_bollinger(prices):
-        # Middle band (SMA)
-        middle = prices.rolling(window=period, min_periods=period).mean()
-        
-        # Standard deviation
-        std = prices.rolling(window=period, min_periods=period).std()
-        
-        # Upper and lower bands
-        upper = middle + (num_std * std)
-        lower = middle - (num_std * std)
-        
+    # Middle band (SMA) and standard deviation
+    middle, std = grouped_rolling_mean_std(prices, codes, period)
+    
+    # Upper and lower bands
+    upper = middle + (num_std * std)
+    lower = middle - (num_std * std)
+    
+    df['bb_middle'] = middle
+    df['bb_upper'] = upper
+    df['bb_lower'] = lower
+    
+    # Flat windows give 0/0 like the pandas arithmetic did; keep it quiet
+    with np.errstate(divide='ignore', invalid='ignore'):
         # Bollinger Band Width
-        bb_width = (upper - lower) / middle
+        df['bb_width'] = (upper - lower) / middle
         
         # %B (position within bands)
-        percent_b = (prices - lower) / (upper - lower)
-        
-        return pd.DataFrame({
-            'bb_middle': middle,
-            'bb_upper': upper,
-            'bb_lower': lower,
-            'bb_width': bb_width,
-            'bb_percent': percent_b
-        })
-    
-    bb_df = df.groupby('symbol')[price_column].apply(compute_bollinger).reset_index(level=0, drop=True)
-    df = pd.concat([df, bb_df], axis=1)
+        df['bb_percent'] = (prices - lower) / (upper - lower)
     
     logger.debug(f"Calculated Bollinger Bands (period={period}, std={num_std})")
     
@@ -231,13 +222,15 @@ def calculate_momentum(
     Returns:
         DataFrame with momentum columns added
     """
-    df = df.copy()
+    # Gaps are forward-filled within each symbol before comparing, as pct_change does
+    codes, _ = get_group_codes(df['symbol'])
+    *shifted, filled = grouped_shift(
+        df[price_column].to_numpy(dtype=np.float64), codes, periods, ffill=True
+    )
     
-    for period in periods:
-        col_name = f'momentum_{period}'
-        df[col_name] = df.groupby('symbol')[price_column].transform(
-            lambda x: x.pct_change(periods=period)
-        )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for period, previous in zip(periods, shifted):
+            df[f'momentum_{period}'] = filled / previous - 1
     
     logger.debug(f"Calculated momentum for periods: {periods}")
     
@@ -262,17 +255,14 @@ def calculate_price_zscores(
     Returns:
         DataFrame with z-score column added
     """
-    df = df.copy()
+    codes, _ = get_group_codes(df['symbol'])
+    prices = df[price_column].to_numpy(dtype=np.float64)
     
-    def compute_zscore(prices):
-        rolling_mean = prices.rolling(window=window, min_periods=window).mean()
-        rolling_std = prices.rolling(window=window, min_periods=window).std()
-        
-        zscore = (prices - rolling_mean) / rolling_std
-        
-        return zscore
+    # Rolling moments with bottleneck directly on the price array
+    rolling_mean, rolling_std = grouped_rolling_mean_std(prices, codes, window)
     
-    df['price_zscore'] = df.groupby('symbol')[price_column].transform(compute_zscore)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df['price_zscore'] = (prices - rolling_mean) / rolling_std
     
     logger.debug(f"Calculated price z-scores with window {window}")
     
@@ -295,11 +285,11 @@ def calculate_price_lags(
     Returns:
         DataFrame with lagged price columns added
     """
-    df = df.copy()
+    codes, _ = get_group_codes(df['symbol'])
+    lagged = grouped_shift(df[price_column].to_numpy(dtype=np.float64), codes, lags)
     
-    for lag in lags:
-        col_name = f'{price_column}_lag_{lag}'
-        df[col_name] = df.groupby('symbol')[price_column].shift(lag)
+    for lag, values in zip(lags, lagged):
+        df[f'{price_column}_lag_{lag}'] = values
     
     logger.debug(f"Calculated price lags: {lags}")
     
@@ -320,25 +310,34 @@ def calculate_returns(
     Returns:
         DataFrame with return columns added
     """
-    df = df.copy()
-    
-    # Calculate simple return
-    df['simple_return'] = df.groupby('symbol')[price_column].pct_change()
+    grouped = df.groupby('symbol', sort=False, observed=True)[price_column]
+    
+    # Calculate simple return; a missing price is bridged from the last
+    # known one (pad, then change), as pct_change's old default fill did
+    simple_return = (
+        grouped.ffill()
+        .groupby(df['symbol'], sort=False, observed=True)
+        .pct_change(fill_method=None)
+        .to_numpy(dtype=np.float64, copy=True)
+    )
     
-    # Calculate log return
-    df['log_return'] = df.groupby('symbol')[price_column].apply(
-        lambda x: np.log(x / x.shift(1))
-    ).reset_index(level=0, drop=True)
+    # Calculate log return from the unfilled prices, so it stays 0 next to
+    # a gap (log1p(r) == log(p / p_prev), more accurate near zero)
+    log_return = np.log1p(grouped.pct_change(fill_method=None).to_numpy(dtype=np.float64))
     
     # Fill NA with 0 for the first period
-    df['simple_return'] = df['simple_return'].fillna(0)
-    df['log_return'] = df['log_return'].fillna(0)
+    np.nan_to_num(simple_return, copy=False, nan=0.0, posinf=np.inf, neginf=-np.inf)
+    np.nan_to_num(log_return, copy=False, nan=0.0, posinf=np.inf, neginf=-np.inf)
+    
+    df['simple_return'] = simple_return
+    df['log_return'] = log_return
     
     logger.debug(f"Calculated returns (simple and log)")
     
     return df
 
 
+@with_feature_options
 def calculate_all_price_features(
     df: pd.DataFrame,
     config: dict = None
@@ -358,6 +357,9 @@ def calculate_all_price_features(
     if config is None:
         config = {}
     
+    # Single defensive (copy-on-write) copy; the helpers below mutate it in place
+    df = df.copy(deep=False)
+    
     # SMA
     sma_periods = config.get('sma_periods', [5, 10, 20, 50])
     df = calculate_sma(df, periods=sma_periods)
@@ -0,0 +1,159 @@
+"""Polars implementation of the price-based features.
+
+Expresses every feature from price_features as a Polars expression
+evaluated per symbol with ``.over('symbol')``, so the whole chain is
+planned and collected once. Values follow the pandas implementation.
+"""
+
+from typing import List
+
+import polars as pl
+
+from src.utils import logger
+
+
+def _sma_exprs(price: pl.Expr, periods: List[int]) -> List[pl.Expr]:
+    """Simple moving averages."""
+    return [
+        price.rolling_mean(window_size=period).over('symbol').alias(f'sma_{period}')
+        for period in periods
+    ]
+
+
+def _ema(price: pl.Expr, span: int) -> pl.Expr:
+    """
+    EMA with pandas ewm semantics (adjust=False, ignore_na=False).
+    
+    Polars leaves the rows with a missing price null, while pandas
+    carries the last average forward; forward-filling the result
+    reproduces that (still per symbol once wrapped in ``.over``).
+    """
+    return price.ewm_mean(span=span, adjust=False, ignore_nulls=False).forward_fill()
+
+
+def _ema_exprs(price: pl.Expr, periods: List[int]) -> List[pl.Expr]:
+    """Exponential moving averages (adjust=False, like pandas ewm)."""
+    return [
+        _ema(price, period).over('symbol').alias(f'ema_{period}')
+        for period in periods
+    ]
+
+
+def _rsi_expr(price: pl.Expr, period: int) -> pl.Expr:
+    """RSI from rolling mean gains and losses."""
+    delta = price.diff()
+    
+    gains = pl.when(delta > 0).then(delta).otherwise(0.0)
+    losses = pl.when(delta < 0).then(-delta).otherwise(0.0)
+    
+    rs = gains.rolling_mean(window_size=period) / losses.rolling_mean(window_size=period)
+    
+    return (100 - (100 / (1 + rs))).over('symbol').alias('rsi')
+
+
+def _macd_exprs(price: pl.Expr, fast: int, slow: int, signal: int) -> List[pl.Expr]:
+    """MACD line, signal and histogram."""
+    macd_line = _ema(price, fast) - _ema(price, slow)
+    signal_line = _ema(macd_line, signal)
+    
+    return [
+        macd_line.over('symbol').alias('macd'),
+        signal_line.over('symbol').alias('macd_signal'),
+        (macd_line - signal_line).over('symbol').alias('macd_hist')
+    ]
+
+
+def _bollinger_exprs(price: pl.Expr, period: int, num_std: float) -> List[pl.Expr]:
+    """Bollinger middle/upper/lower bands, width and %B."""
+    middle = price.rolling_mean(window_size=period)
+    std = price.rolling_std(window_size=period)
+    
+    upper = middle + num_std * std
+    lower = middle - num_std * std
+    
+    return [
+        middle.over('symbol').alias('bb_middle'),
+        upper.over('symbol').alias('bb_upper'),
+        lower.over('symbol').alias('bb_lower'),
+        ((upper - lower) / middle).over('symbol').alias('bb_width'),
+        ((price - lower) / (upper - lower)).over('symbol').alias('bb_percent')
+    ]
+
+
+def _momentum_exprs(price: pl.Expr, periods: List[int]) -> List[pl.Expr]:
+    """Percentage change over N periods (gaps forward-filled, as in pandas)."""
+    return [
+        price.forward_fill().pct_change(period).over('symbol').alias(f'momentum_{period}')
+        for period in periods
+    ]
+
+
+def _return_exprs(price: pl.Expr) -> List[pl.Expr]:
+    """Simple (gaps bridged, as in pandas) and log returns, 0 where undefined."""
+    filled = price.forward_fill()
+    simple_return = (filled / filled.shift(1) - 1).over('symbol')
+    log_return = (price / price.shift(1)).log().over('symbol')
+    
+    return [
+        simple_return.fill_nan(0.0).fill_null(0.0).alias('simple_return'),
+        log_return.fill_nan(0.0).fill_null(0.0).alias('log_return')
+    ]
+
+
+def _zscore_expr(price: pl.Expr, window: int) -> pl.Expr:
+    """Rolling z-score of the price."""
+    zscore = (price - price.rolling_mean(window_size=window)) / price.rolling_std(window_size=window)
+    
+    return zscore.over('symbol').alias('price_zscore')
+
+
+def _lag_exprs(price: pl.Expr, price_column: str, lags: List[int]) -> List[pl.Expr]:
+    """Lagged prices."""
+    return [
+        price.shift(lag).over('symbol').alias(f'{price_column}_lag_{lag}')
+        for lag in lags
+    ]
+
+
+def calculate_all_price_features_pl(
+    df: pl.LazyFrame,
+    config: dict = None,
+    price_column: str = 'adj_close'
+) -> pl.LazyFrame:
+    """
+    Build all price-based features as one lazy projection.
+    
+    Args:
+        df: LazyFrame with price data
+        config: Configuration dictionary with feature parameters
+        price_column: Column to use for calculation
+        
+    Returns:
+        LazyFrame with all price features added
+    """
+    logger.info("Calculating price-based features (polars)...")
+    
+    if config is None:
+        config = {}
+    
+    price = pl.col(price_column).cast(pl.Float64)
+    momentum_periods = config.get('price_lags', [1, 5, 10, 20])
+    
+    exprs = (
+        _sma_exprs(price, config.get('sma_periods', [5, 10, 20, 50]))
+        + _ema_exprs(price, config.get('ema_periods', [12, 26]))
+        + [_rsi_expr(price, config.get('rsi_period', 14))]
+        + _macd_exprs(
+            price,
+            config.get('macd_fast', 12),
+            config.get('macd_slow', 26),
+            config.get('macd_signal', 9)
+        )
+        + _bollinger_exprs(price, config.get('bollinger_period', 20), config.get('bollinger_std', 2.0))
+        + _momentum_exprs(price, momentum_periods)
+        + _return_exprs(price)
+        + [_zscore_expr(price, 20)]
+        + _lag_exprs(price, price_column, momentum_periods)
+    )
+    
+    return df.with_columns(exprs)
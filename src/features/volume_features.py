@@ -1,16 +1,102 @@
-"""Volume and liquidity features for BVMT forecasting system."""
+"""Volume and liquidity features for BVMT forecasting system.
+
+The individual helpers add columns to the DataFrame they are given in
+place; calculate_all_volume_features works on its own (copy-on-write)
+copy of the input.
+"""
 
 import pandas as pd
 import numpy as np
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+
+from src.features.kernels import get_group_codes, grouped_rolling_mean, grouped_shift
+from src.features.pandas_options import with_feature_options
+from src.utils import logger, config as app_config
+
+
+# Options for pandas' numba rolling engine: compiled, GIL-free and parallel over groups
+NUMBA_ENGINE_KWARGS = {'nopython': True, 'nogil': True, 'parallel': True}
 
-from src.utils import logger
+
+def _rolling_engine_kwargs(engine: Optional[str]) -> dict:
+    """Keyword arguments selecting the rolling aggregation engine."""
+    if engine == 'numba':
+        return {'engine': 'numba', 'engine_kwargs': NUMBA_ENGINE_KWARGS}
+    return {}
+
+
+def _grouped_rolling_mean(
+    df: pd.DataFrame,
+    column: str,
+    window: int,
+    engine: Optional[str] = None
+):
+    """
+    Per-symbol rolling mean aligned to the rows of df.
+    
+    By default one ``bottleneck.move_mean`` pass runs over the whole column
+    (symbols made contiguous, windows crossing a symbol boundary masked);
+    ``engine='numba'`` uses pandas' numba groupby().rolling() instead.
+    
+    Args:
+        df: DataFrame with symbol column
+        column: Column to average
+        window: Rolling window size (also the minimum number of observations)
+        engine: Rolling engine ('numba' or None for bottleneck)
+        
+    Returns:
+        Rolling mean array (or Series indexed like df for numba) in row order
+    """
+    if engine != 'numba':
+        codes, _ = get_group_codes(df['symbol'])
+        return grouped_rolling_mean(df[column].to_numpy(dtype=np.float64), codes, window)
+    
+    rolling_mean = (
+        df.groupby('symbol', sort=False, observed=True)[column]
+        .rolling(window=window, min_periods=window)
+        .mean(**_rolling_engine_kwargs(engine))
+    )
+    
+    # Keyed by (symbol, row) in some pandas versions, by row only in others
+    if isinstance(rolling_mean.index, pd.MultiIndex):
+        rolling_mean = rolling_mean.droplevel(0)
+    
+    return rolling_mean
+
+
+def _safe_divide(numerator: pd.Series, denominator: pd.Series) -> np.ndarray:
+    """Elementwise ratio with division-by-zero infinities mapped to NaN."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = numerator.to_numpy(dtype=np.float64) / denominator.to_numpy(dtype=np.float64)
+    ratio[np.isinf(ratio)] = np.nan
+    
+    return ratio
+
+
+def _set_columns(df: pd.DataFrame, **columns: np.ndarray) -> None:
+    """
+    Add freshly computed arrays to df as columns.
+    
+    Wrapping each array in a Series first lets copy-on-write take it by
+    reference; assigning a bare ndarray copies it defensively.
+    """
+    for name, values in columns.items():
+        df[name] = pd.Series(values, index=df.index, copy=False)
+
+
+def warm_up_numba_rolling() -> None:
+    """Compile the numba grouped rolling mean once so the first real call is fast."""
+    dummy = pd.DataFrame({'symbol': ['a', 'a', 'b', 'b'], 'value': [1.0, 2.0, 3.0, 4.0]})
+    dummy.groupby('symbol', sort=False, observed=True)['value'].rolling(window=2, min_periods=2).mean(
+        **_rolling_engine_kwargs('numba')
+    )
 
 
 def calculate_volume_ma(
     df: pd.DataFrame,
     period: int = 20,
-    volume_column: str = 'volume'
+    volume_column: str = 'volume',
+    engine: Optional[str] = None
 ) -> pd.DataFrame:
     """
     Calculate volume moving average.
@@ -19,15 +105,12 @@ def calculate_volume_ma(
         df: DataFrame with volume data
         period: Moving average period
         volume_column: Column to use for calculation
+        engine: Rolling engine ('numba' or None for bottleneck)
         
     Returns:
         DataFrame with volume MA column added
     """
-    df = df.copy()
-    
-    df['volume_ma'] = df.groupby('symbol')[volume_column].transform(
-        lambda x: x.rolling(window=period, min_periods=period).mean()
-    )
+    _set_columns(df, volume_ma=_grouped_rolling_mean(df, volume_column, period, engine=engine))
     
     logger.debug(f"Calculated volume MA with period {period}")
     
@@ -37,7 +120,8 @@ def calculate_volume_ma(
 def calculate_volume_ratio(
     df: pd.DataFrame,
     period: int = 20,
-    volume_column: str = 'volume'
+    volume_column: str = 'volume',
+    engine: Optional[str] = None
 ) -> pd.DataFrame:
     """
     Calculate volume ratio (current volume / average volume).
@@ -46,21 +130,17 @@ def calculate_volume_ratio(
         df: DataFrame with volume data
         period: Period for average calculation
         volume_column: Column to use for calculation
+        engine: Rolling engine used if the volume MA must be computed
         
     Returns:
         DataFrame with volume ratio column added
     """
-    df = df.copy()
-    
     # Calculate volume MA first if not exists
     if 'volume_ma' not in df.columns:
-        df = calculate_volume_ma(df, period=period, volume_column=volume_column)
-    
-    # Calculate ratio
-    df['volume_ratio'] = df[volume_column] / df['volume_ma']
+        df = calculate_volume_ma(df, period=period, volume_column=volume_column, engine=engine)
     
-    # Handle division by zero
-    df['volume_ratio'] = df['volume_ratio'].replace([np.inf, -np.inf], np.nan)
+    # Calculate ratio (division by zero gives NaN)
+    _set_columns(df, volume_ratio=_safe_divide(df[volume_column], df['volume_ma']))
     
     logger.debug(f"Calculated volume ratio")
     
@@ -71,7 +151,8 @@ def calculate_liquidity_regime(
     df: pd.DataFrame,
     q_low: float = 0.20,
     q_high: float = 0.80,
-    volume_column: str = 'volume'
+    volume_column: str = 'volume',
+    with_label: bool = False
 ) -> pd.DataFrame:
     """
     Classify liquidity regime using volume quantiles.
@@ -86,36 +167,34 @@ def calculate_liquidity_regime(
         q_low: Lower quantile threshold (default: 0.20)
         q_high: Upper quantile threshold (default: 0.80)
         volume_column: Column to use for calculation
+        with_label: Also add the 'Low'/'Normal'/'High' string column
+            ``liquidity_regime`` (off by default: models use the one-hots)
         
     Returns:
         DataFrame with liquidity regime columns added
     """
-    df = df.copy()
+    # Quantiles for each symbol, broadcast back to its rows
+    grouped = df.groupby('symbol', sort=False, observed=True)[volume_column]
+    q20 = grouped.transform('quantile', q_low).to_numpy()
+    q80 = grouped.transform('quantile', q_high).to_numpy()
     
-    def classify_regime(group):
-        # Calculate quantiles for this symbol
-        q20 = group[volume_column].quantile(q_low)
-        q80 = group[volume_column].quantile(q_high)
-        
-        # Classify regime
-        regime = pd.Series('Normal', index=group.index)
-        regime[group[volume_column] < q20] = 'Low'
-        regime[group[volume_column] > q80] = 'High'
-        
-        # Add quantile values
-        return pd.DataFrame({
-            'liquidity_regime': regime,
-            'volume_q20': q20,
-            'volume_q80': q80
-        }, index=group.index)
+    # Classify regime
+    volume = df[volume_column].to_numpy()
+    low = volume < q20
+    high = volume > q80
     
-    regime_df = df.groupby('symbol').apply(classify_regime).reset_index(level=0, drop=True)
-    df = pd.concat([df, regime_df], axis=1)
+    if with_label:
+        df['liquidity_regime'] = np.where(low, 'Low', np.where(high, 'High', 'Normal'))
     
-    # One-hot encode regime
-    df['liquidity_low'] = (df['liquidity_regime'] == 'Low').astype(int)
-    df['liquidity_normal'] = (df['liquidity_regime'] == 'Normal').astype(int)
-    df['liquidity_high'] = (df['liquidity_regime'] == 'High').astype(int)
+    # Thresholds and one-hot encoded regime
+    _set_columns(
+        df,
+        volume_q20=q20,
+        volume_q80=q80,
+        liquidity_low=low.astype(np.int8),
+        liquidity_normal=(~low & ~high).astype(np.int8),
+        liquidity_high=high.astype(np.int8)
+    )
     
     logger.debug(f"Calculated liquidity regimes (Q{int(q_low*100)}/Q{int(q_high*100)})")
     
@@ -138,13 +217,8 @@ def calculate_avg_trade_size(
     Returns:
         DataFrame with average trade size column added
     """
-    df = df.copy()
-    
-    # Calculate average trade size
-    df['avg_trade_size'] = df[volume_column] / df[num_trades_column]
-    
-    # Handle division by zero
-    df['avg_trade_size'] = df['avg_trade_size'].replace([np.inf, -np.inf], np.nan)
+    # Calculate average trade size (division by zero gives NaN)
+    _set_columns(df, avg_trade_size=_safe_divide(df[volume_column], df[num_trades_column]))
     
     logger.debug(f"Calculated average trade size")
     
@@ -154,7 +228,8 @@ def calculate_avg_trade_size(
 def calculate_turnover_ratio(
     df: pd.DataFrame,
     window: int = 20,
-    turnover_column: str = 'turnover'
+    turnover_column: str = 'turnover',
+    engine: Optional[str] = None
 ) -> pd.DataFrame:
     """
     Calculate turnover ratio (current / rolling average).
@@ -163,22 +238,16 @@ def calculate_turnover_ratio(
         df: DataFrame with turnover data
         window: Rolling window size
         turnover_column: Turnover column name
+        engine: Rolling engine ('numba' or None for bottleneck)
         
     Returns:
         DataFrame with turnover ratio column added
     """
-    df = df.copy()
-    
     # Calculate rolling average turnover
-    df['turnover_ma'] = df.groupby('symbol')[turnover_column].transform(
-        lambda x: x.rolling(window=window, min_periods=window).mean()
-    )
-    
-    # Calculate ratio
-    df['turnover_ratio'] = df[turnover_column] / df['turnover_ma']
+    _set_columns(df, turnover_ma=_grouped_rolling_mean(df, turnover_column, window, engine=engine))
     
-    # Handle division by zero
-    df['turnover_ratio'] = df['turnover_ratio'].replace([np.inf, -np.inf], np.nan)
+    # Calculate ratio (division by zero gives NaN)
+    _set_columns(df, turnover_ratio=_safe_divide(df[turnover_column], df['turnover_ma']))
     
     logger.debug(f"Calculated turnover ratio")
     
@@ -201,13 +270,17 @@ def calculate_volume_momentum(
     Returns:
         DataFrame with volume momentum columns added
     """
-    df = df.copy()
+    # All lags in one grouped pass (gaps forward-filled, as pct_change does)
+    codes, _ = get_group_codes(df['symbol'])
+    *shifted, volume = grouped_shift(
+        df[volume_column].to_numpy(dtype=np.float64), codes, periods, ffill=True
+    )
     
-    for period in periods:
-        col_name = f'volume_momentum_{period}'
-        df[col_name] = df.groupby('symbol')[volume_column].transform(
-            lambda x: x.pct_change(periods=period)
-        )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        _set_columns(df, **{
+            f'volume_momentum_{period}': volume / prev - 1
+            for period, prev in zip(periods, shifted)
+        })
     
     logger.debug(f"Calculated volume momentum for periods: {periods}")
     
@@ -232,13 +305,8 @@ def calculate_bid_ask_spread_proxy(
     Returns:
         DataFrame with spread proxy column added
     """
-    df = df.copy()
-    
-    # Calculate spread proxy
-    df['spread_proxy'] = (df[high_column] - df[low_column]) / df[close_column]
-    
-    # Handle division by zero
-    df['spread_proxy'] = df['spread_proxy'].replace([np.inf, -np.inf], np.nan)
+    # Calculate spread proxy (division by zero gives NaN)
+    _set_columns(df, spread_proxy=_safe_divide(df[high_column] - df[low_column], df[close_column]))
     
     logger.debug(f"Calculated bid-ask spread proxy")
     
@@ -265,22 +333,30 @@ def calculate_volume_price_trend(
     Returns:
         DataFrame with VPT column added
     """
-    df = df.copy()
+    # Calculate price change percentage per symbol (gaps forward-filled, as pct_change does)
+    codes, _ = get_group_codes(df['symbol'])
+    close_prev, close = grouped_shift(
+        df[close_column].to_numpy(dtype=np.float64), codes, [1], ffill=True
+    )
     
-    # Calculate price change percentage per symbol
-    price_change_pct = df.groupby('symbol')[close_column].pct_change().fillna(0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        price_change_pct = close / close_prev - 1
+    price_change_pct[np.isnan(price_change_pct)] = 0.0
     
     # Calculate VPT increment
-    vpt_inc = df[volume_column] * price_change_pct
+    vpt_inc = df[volume_column].to_numpy(dtype=np.float64) * price_change_pct
     
     # Calculate Cumulative VPT
-    df['vpt'] = vpt_inc.groupby(df['symbol']).cumsum()
+    df['vpt'] = pd.Series(vpt_inc, index=df.index).groupby(
+        df['symbol'], sort=False, observed=True
+    ).cumsum()
     
     logger.debug(f"Calculated Volume Price Trend")
     
     return df
 
 
+@with_feature_options
 def calculate_all_volume_features(
     df: pd.DataFrame,
     config: dict = None
@@ -300,16 +376,31 @@ def calculate_all_volume_features(
     if config is None:
         config = {}
     
+    # Shallow copy: with copy-on-write the caller's frame is never modified
+    # and only the columns written below are materialized
+    df = df.copy(deep=False)
+    
+    # Group on integer category codes instead of hashing symbol strings in
+    # every groupby below; the caller's column is put back at the end
+    symbol = df['symbol']
+    if not isinstance(symbol.dtype, pd.CategoricalDtype):
+        df['symbol'] = symbol.astype('category')
+    
+    # Rolling engine for the moving averages: None = one bottleneck move_mean
+    # pass per column, 'numba' = pandas' numba groupby().rolling()
+    engine = config.get('rolling_engine')
+    
     # Volume MA and ratio
     volume_ma_period = config.get('volume_ma_period', 20)
-    df = calculate_volume_ma(df, period=volume_ma_period)
-    df = calculate_volume_ratio(df, period=volume_ma_period)
+    df = calculate_volume_ma(df, period=volume_ma_period, engine=engine)
+    df = calculate_volume_ratio(df, period=volume_ma_period, engine=engine)
     
     # Liquidity regime
     df = calculate_liquidity_regime(
         df,
         q_low=config.get('liquidity_q_low', 0.20),
-        q_high=config.get('liquidity_q_high', 0.80)
+        q_high=config.get('liquidity_q_high', 0.80),
+        with_label=config.get('liquidity_regime_label', False)
     )
     
     # Average trade size
@@ -318,7 +409,7 @@ def calculate_all_volume_features(
     
     # Turnover ratio
     if 'turnover' in df.columns:
-        df = calculate_turnover_ratio(df)
+        df = calculate_turnover_ratio(df, engine=engine)
     
     # Volume momentum
     volume_lags = config.get('volume_lags', [1, 5, 10])
@@ -330,6 +421,13 @@ def calculate_all_volume_features(
     # Volume Price Trend
     df = calculate_volume_price_trend(df)
     
+    df['symbol'] = symbol
+    
     logger.info(f"✓ Volume features complete")
     
     return df
+
+
+# Pay the JIT compile cost at import when the numba engine is configured
+if app_config.get('features.rolling_engine') == 'numba':
+    warm_up_numba_rolling()
@@ -0,0 +1,112 @@
+"""Polars implementation of the volume and liquidity features.
+
+Mirrors volume_features as Polars expressions evaluated per symbol with
+``.over('symbol')``, added in a single lazy projection. Values follow
+the pandas implementation.
+"""
+
+from typing import List
+
+import polars as pl
+
+from src.utils import logger
+
+
+def _finite(expr: pl.Expr) -> pl.Expr:
+    """Replace +/-inf (division by zero) with null."""
+    return pl.when(expr.is_infinite()).then(None).otherwise(expr)
+
+
+def _liquidity_exprs(
+    volume: pl.Expr,
+    q_low: float,
+    q_high: float,
+    with_label: bool = False
+) -> List[pl.Expr]:
+    """Liquidity thresholds, one-hot columns and (optionally) the regime label."""
+    q20 = volume.quantile(q_low, interpolation='linear').over('symbol')
+    q80 = volume.quantile(q_high, interpolation='linear').over('symbol')
+    
+    low = (volume < q20).fill_null(False)
+    high = (volume > q80).fill_null(False)
+    
+    exprs = [
+        q20.alias('volume_q20'),
+        q80.alias('volume_q80'),
+        low.cast(pl.Int8).alias('liquidity_low'),
+        (~low & ~high).cast(pl.Int8).alias('liquidity_normal'),
+        high.cast(pl.Int8).alias('liquidity_high')
+    ]
+    
+    if with_label:
+        exprs.insert(0, pl.when(low).then(pl.lit('Low')).when(high).then(pl.lit('High')).otherwise(pl.lit('Normal')).alias('liquidity_regime'))
+    
+    return exprs
+
+
+def calculate_all_volume_features_pl(
+    df: pl.LazyFrame,
+    config: dict = None
+) -> pl.LazyFrame:
+    """
+    Build all volume and liquidity features as one lazy projection.
+    
+    Args:
+        df: LazyFrame with volume data
+        config: Configuration dictionary with feature parameters
+        
+    Returns:
+        LazyFrame with all volume features added
+    """
+    logger.info("Calculating volume and liquidity features (polars)...")
+    
+    if config is None:
+        config = {}
+    
+    columns = df.collect_schema().names()
+    
+    volume = pl.col('volume').cast(pl.Float64)
+    period = config.get('volume_ma_period', 20)
+    
+    # Volume MA and ratio
+    volume_ma = volume.rolling_mean(window_size=period).over('symbol')
+    exprs = [
+        volume_ma.alias('volume_ma'),
+        _finite(volume / volume_ma).alias('volume_ratio')
+    ]
+    
+    # Liquidity regime
+    exprs += _liquidity_exprs(
+        volume,
+        config.get('liquidity_q_low', 0.20),
+        config.get('liquidity_q_high', 0.80),
+        config.get('liquidity_regime_label', False)
+    )
+    
+    # Average trade size
+    if 'num_trades' in columns:
+        exprs.append(_finite(volume / pl.col('num_trades')).alias('avg_trade_size'))
+    
+    # Turnover ratio
+    if 'turnover' in columns:
+        turnover = pl.col('turnover').cast(pl.Float64)
+        turnover_ma = turnover.rolling_mean(window_size=20).over('symbol')
+        exprs += [
+            turnover_ma.alias('turnover_ma'),
+            _finite(turnover / turnover_ma).alias('turnover_ratio')
+        ]
+    
+    # Volume momentum (gaps forward-filled, as pandas pct_change does)
+    exprs += [
+        volume.forward_fill().pct_change(lag).over('symbol').alias(f'volume_momentum_{lag}')
+        for lag in config.get('volume_lags', [1, 5, 10])
+    ]
+    
+    # Bid-ask spread proxy
+    exprs.append(_finite((pl.col('high') - pl.col('low')) / pl.col('close')).alias('spread_proxy'))
+    
+    # Volume Price Trend
+    price_change_pct = pl.col('close').cast(pl.Float64).forward_fill().pct_change().fill_null(0.0).fill_nan(0.0)
+    exprs.append((volume * price_change_pct).cum_sum().over('symbol').alias('vpt'))
+    
+    return df.with_columns(exprs)
@@ -150,6 +150,7 @@ class QuantileForecaster(BaseForecaster):
         super().__init__(model_name)
         self.quantiles = quantiles
         self.models = {}  # One model per quantile
+        self._ci_map = {}  # (confidence level, available quantiles) -> (lower, upper)
     
     @abstractmethod
     def fit(
@@ -202,38 +203,62 @@ class QuantileForecaster(BaseForecaster):
             Dictionary mapping confidence level -> (lower, upper) bounds
         """
         predictions = self.predict(X)
+        available_quantiles = tuple(predictions.keys())
         intervals = {}
         
         for conf_level in confidence_levels:
-            alpha = 1 - conf_level
-            lower_q = alpha / 2
-            upper_q = 1 - (alpha / 2)
+            key = (conf_level, available_quantiles)
+            if key not in self._ci_map:
+                self._ci_map[key] = self._match_interval_quantiles(conf_level, available_quantiles)
             
-            # Find closest available quantile
-            def find_closest_quantile(target_q, available_qs):
-                if not available_qs:
-                    return None
-                closest = min(available_qs, key=lambda x: abs(x - target_q))
-                if abs(closest - target_q) < 1e-6:
-                    return closest
-                return None
-
-            available_quantiles = list(predictions.keys())
-            
-            actual_lower_q = find_closest_quantile(lower_q, available_quantiles)
-            actual_upper_q = find_closest_quantile(upper_q, available_quantiles)
-            
-            if actual_lower_q is None or actual_upper_q is None:
-                logger.warning(f"Quantiles {lower_q:.3f}, {upper_q:.3f} not found for {conf_level} CI. Available: {available_quantiles}")
+            bounds = self._ci_map[key]
+            if bounds is None:
                 continue
             
             intervals[conf_level] = (
-                predictions[actual_lower_q],
-                predictions[actual_upper_q]
+                predictions[bounds[0]],
+                predictions[bounds[1]]
             )
         
         return intervals
     
+    @staticmethod
+    def _match_interval_quantiles(
+        conf_level: float,
+        available_quantiles: Tuple[float, ...]
+    ) -> Optional[Tuple[float, float]]:
+        """
+        Find the available quantiles bounding a central confidence interval.
+        
+        Args:
+            conf_level: Confidence level (e.g., 0.95)
+            available_quantiles: Quantiles with predictions
+            
+        Returns:
+            (lower, upper) quantiles, or None if either is not available
+        """
+        alpha = 1 - conf_level
+        lower_q = alpha / 2
+        upper_q = 1 - (alpha / 2)
+        
+        # Find closest available quantile
+        def find_closest_quantile(target_q, available_qs):
+            if not available_qs:
+                return None
+            closest = min(available_qs, key=lambda x: abs(x - target_q))
+            if abs(closest - target_q) < 1e-6:
+                return closest
+            return None
+        
+        actual_lower_q = find_closest_quantile(lower_q, available_quantiles)
+        actual_upper_q = find_closest_quantile(upper_q, available_quantiles)
+        
+        if actual_lower_q is None or actual_upper_q is None:
+            logger.warning(f"Quantiles {lower_q:.3f}, {upper_q:.3f} not found for {conf_level} CI. Available: {list(available_quantiles)}")
+            return None
+        
+        return actual_lower_q, actual_upper_q
+    
     def save(self, path: Path) -> None:
         """Save all quantile models."""
         path = Path(path)
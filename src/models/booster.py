@@ -0,0 +1,355 @@
+"""Lightweight predictors around native XGBoost boosters."""
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from multiprocessing import shared_memory
+import multiprocessing
+import os
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Tuple, Union
+import xgboost as xgb
+
+from src.utils import logger, attach_array
+from src.utils.parallel import ArraySpec
+
+
+# Per-process state for horizon workers (see fit_horizons_in_pool): the
+# shared feature matrix is attached, and its histogram cuts sketched, once
+# per worker instead of being pickled with every task.
+_worker_shm = None
+_worker_X = None
+_worker_feature_names = None
+_worker_fit_args = ()
+_worker_ref = None
+
+
+@lru_cache(maxsize=None)
+def _cuda_available() -> bool:
+    """Whether XGBoost was built with CUDA and can train on a GPU here."""
+    if not xgb.build_info().get('USE_CUDA'):
+        return False
+    
+    try:
+        probe = xgb.DMatrix(np.zeros((2, 1), dtype=np.float32), label=[0.0, 1.0])
+        xgb.train({'device': 'cuda', 'tree_method': 'hist'}, probe, num_boost_round=1)
+    except xgb.core.XGBoostError:
+        return False
+    
+    return True
+
+
+def resolve_device(device: Optional[str] = 'auto') -> str:
+    """
+    Resolve the XGBoost training device.
+    
+    Args:
+        device: 'auto' (or None) for the GPU when one is usable, else an
+            explicit XGBoost device string ('cpu', 'cuda', 'cuda:1', ...)
+        
+    Returns:
+        XGBoost device string
+    """
+    if device not in (None, 'auto'):
+        return device
+    
+    return 'cuda' if _cuda_available() else 'cpu'
+
+
+def to_train_params(xgb_params: Dict) -> Tuple[Dict, int]:
+    """
+    Translate sklearn-style XGBoost parameters for ``xgb.train``.
+    
+    The native learner accepts the sklearn aliases (``learning_rate``,
+    ``random_state``, ``n_jobs``, ``reg_alpha``...) as-is; only the number
+    of boosting rounds has to be passed separately.
+    
+    Args:
+        xgb_params: Parameters as accepted by ``xgb.XGBRegressor``
+        
+    Returns:
+        Tuple of (booster parameters, number of boosting rounds)
+    """
+    params = dict(xgb_params)
+    num_boost_round = params.pop('n_estimators', 100)
+    
+    return params, num_boost_round
+
+
+def cpu_budget(xgb_params: Dict) -> int:
+    """
+    Threads a multi-horizon fit may use in total.
+    
+    Args:
+        xgb_params: XGBoost parameters
+        
+    Returns:
+        ``n_jobs`` when it is positive, else the CPU count
+    """
+    n_jobs = xgb_params.get('n_jobs') or -1
+    
+    return n_jobs if n_jobs > 0 else (os.cpu_count() or 1)
+
+
+def build_reference(
+    X: Union[pd.DataFrame, np.ndarray],
+    max_bin: Optional[int] = None,
+    feature_names: Optional[List[str]] = None
+) -> xgb.QuantileDMatrix:
+    """
+    Sketch histogram cuts for X, to be shared by fits on subsets of X.
+    
+    Args:
+        X: Feature matrix (float32), as a DataFrame or a 2-D array
+        max_bin: Histogram bins per feature (default: XGBoost's)
+        feature_names: Column names when X is an array
+        
+    Returns:
+        Label-less quantized matrix to pass as ``ref`` to ``QuantileDMatrix``
+    """
+    if isinstance(X, pd.DataFrame):
+        feature_names = X.columns.tolist()
+        X = X.to_numpy()
+    
+    return xgb.QuantileDMatrix(
+        X,
+        feature_names=feature_names,
+        max_bin=max_bin
+    )
+
+
+def _init_horizon_worker(spec: ArraySpec, feature_names: List[str], fit_args: tuple) -> None:
+    """Attach the shared float32 feature matrix in a worker process."""
+    global _worker_shm, _worker_X, _worker_feature_names, _worker_fit_args
+    _worker_shm, _worker_X = attach_array(spec)
+    _worker_feature_names = feature_names
+    _worker_fit_args = fit_args
+
+
+def _fit_horizon_in_worker(forecaster_cls: type, forecaster_kwargs: Dict, y: np.ndarray, fit_kwargs: Dict):
+    """Fit one horizon on the worker's shared feature matrix."""
+    global _worker_ref
+    forecaster = forecaster_cls(**forecaster_kwargs)
+    
+    # Sketched from the same matrix as on the sequential path
+    if _worker_ref is None:
+        _worker_ref = forecaster.build_reference(_worker_X, _worker_feature_names)
+    
+    forecaster.fit(
+        _worker_X,
+        y,
+        *_worker_fit_args,
+        ref=_worker_ref,
+        feature_names=_worker_feature_names,
+        **fit_kwargs
+    )
+    
+    return forecaster
+
+
+def fit_horizons_in_pool(
+    forecaster_cls: type,
+    forecaster_kwargs: Dict,
+    xgb_params: Dict,
+    shm: shared_memory.SharedMemory,
+    spec: ArraySpec,
+    feature_names: List[str],
+    targets: Dict[int, np.ndarray],
+    n_workers: int,
+    fit_args: tuple = (),
+    fit_kwargs: Optional[Dict] = None
+) -> Dict[int, Any]:
+    """
+    Fit one forecaster per horizon in spawned worker processes.
+    
+    The feature matrix, already in shared memory (see ``share_array``), is
+    mapped by every worker, which sketches its own histogram cuts (a
+    quantized matrix cannot be pickled). The thread budget (``n_jobs``,
+    default all CPUs) is split evenly between workers. Workers are
+    spawned, as forking after XGBoost has started OpenMP threads is not
+    safe. The shared block is released on return.
+    
+    Args:
+        forecaster_cls: Single-horizon forecaster class
+        forecaster_kwargs: Constructor arguments besides horizon and
+            XGBoost parameters
+        xgb_params: XGBoost parameters
+        shm: Shared memory block holding the feature matrix
+        spec: Spec of the shared matrix
+        feature_names: Column names of the matrix
+        targets: Horizon -> target array aligned with the matrix rows
+        n_workers: Number of worker processes
+        fit_args: Extra positional ``fit`` arguments after the target,
+            the same for every horizon
+        fit_kwargs: Additional fit arguments
+        
+    Returns:
+        Dictionary mapping horizon -> fitted forecaster
+    """
+    n_threads = max(1, cpu_budget(xgb_params) // n_workers)
+    xgb_params = {**xgb_params, 'n_jobs': n_threads}
+    
+    logger.info(f"Training {len(targets)} horizons with {n_workers} worker processes "
+                f"({n_threads} threads each)")
+    
+    try:
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_horizon_worker,
+            initargs=(spec, feature_names, fit_args)
+        ) as executor:
+            futures = {
+                horizon: executor.submit(
+                    _fit_horizon_in_worker,
+                    forecaster_cls,
+                    {**forecaster_kwargs, 'horizon': horizon, **xgb_params},
+                    y,
+                    fit_kwargs or {}
+                )
+                for horizon, y in targets.items()
+            }
+            
+            return {horizon: future.result() for horizon, future in futures.items()}
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def as_float32(X: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cast a feature matrix to float32, the precision of XGBoost's histograms.
+    
+    Args:
+        X: Feature matrix
+        
+    Returns:
+        float32 feature matrix (X itself if already float32)
+    """
+    X32 = X.astype(np.float32, copy=False)
+    
+    # Non-finite values are replaced upstream, so infinities mean overflow
+    overflow = np.isinf(X32.to_numpy()).any(axis=0)
+    if overflow.any():
+        logger.warning(f"Features exceed float32 range: {list(X.columns[overflow])}")
+    
+    return X32
+
+
+class BoosterRegressor:
+    """Minimal regressor interface over a trained ``xgb.Booster``."""
+    
+    def __init__(self, booster: xgb.Booster, feature_names: Optional[List[str]] = None):
+        """
+        Wrap a trained booster.
+        
+        Args:
+            booster: Trained XGBoost booster
+            feature_names: Feature names (default: taken from the booster)
+        """
+        self.booster = booster
+        self.feature_names = feature_names or booster.feature_names
+        self.best_iteration = getattr(booster, 'best_iteration', None)
+    
+    def get_booster(self) -> xgb.Booster:
+        """Return the underlying booster."""
+        return self.booster
+    
+    def _iteration_range(self) -> Tuple[int, int]:
+        """Trees to use: up to the early-stopping best iteration, else all."""
+        if self.best_iteration is None:
+            return (0, 0)
+        return (0, self.best_iteration + 1)
+    
+    def predict(self, X) -> np.ndarray:
+        """
+        Predict without building an intermediate DMatrix.
+        
+        Args:
+            X: Feature matrix (DataFrame or array)
+            
+        Returns:
+            Predictions array
+        """
+        return self.booster.inplace_predict(X, iteration_range=self._iteration_range())
+    
+    @property
+    def feature_importances_(self) -> np.ndarray:
+        """Normalized gain importance, aligned with ``feature_names``."""
+        scores = self.booster.get_score(importance_type='gain')
+        importance = np.array(
+            [scores.get(name, 0.0) for name in self.feature_names],
+            dtype=np.float32
+        )
+        total = importance.sum()
+        
+        return importance / total if total > 0 else importance
+
+
+class QuantileView:
+    """Single-quantile view over a jointly trained multi-quantile booster."""
+    
+    def __init__(self, joint: BoosterRegressor, index: int):
+        """
+        Wrap one output column of a joint model.
+        
+        Args:
+            joint: Booster trained with a list of ``quantile_alpha`` values
+            index: Output column of this quantile
+        """
+        self.joint = joint
+        self.index = index
+    
+    def get_booster(self) -> xgb.Booster:
+        """Return the shared underlying booster."""
+        return self.joint.get_booster()
+    
+    @property
+    def best_iteration(self) -> Optional[int]:
+        """Early-stopping best iteration of the joint model."""
+        return self.joint.best_iteration
+    
+    def predict(self, X) -> np.ndarray:
+        """Predict this quantile only."""
+        return predict_joint(self.joint, X)[:, self.index]
+    
+    @property
+    def feature_importances_(self) -> np.ndarray:
+        """Importance of the shared tree structure."""
+        return self.joint.feature_importances_
+
+
+def predict_booster(model, X) -> np.ndarray:
+    """
+    Predict with the booster behind any fitted XGBoost model.
+    
+    Works for ``BoosterRegressor`` and for pickled ``XGBRegressor`` models
+    alike, going straight to ``inplace_predict`` so no DMatrix is built.
+    
+    Args:
+        model: Fitted model exposing ``get_booster()``
+        X: Feature matrix
+        
+    Returns:
+        Predictions array
+    """
+    best_iteration = getattr(model, 'best_iteration', None)
+    iteration_range = (0, 0) if best_iteration is None else (0, best_iteration + 1)
+    
+    return model.get_booster().inplace_predict(X, iteration_range=iteration_range)
+
+
+def predict_joint(joint: BoosterRegressor, X) -> np.ndarray:
+    """
+    Predict all quantiles of a joint model as an (n_samples, n_quantiles) array.
+    
+    Args:
+        joint: Booster trained with a list of ``quantile_alpha`` values
+        X: Feature matrix
+        
+    Returns:
+        2-D predictions array
+    """
+    preds = joint.predict(X)
+    
+    return preds.reshape(len(preds), -1)
@@ -1,13 +1,27 @@
 """XGBoost quantile regression models for price forecasting."""
 
+import json
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+from pandas.core.groupby import SeriesGroupBy
 import xgboost as xgb
-from tqdm import tqdm
 
 from src.models.base import QuantileForecaster
-from src.utils import logger
+from src.models.booster import (
+    BoosterRegressor,
+    QuantileView,
+    as_float32,
+    build_reference,
+    cpu_budget,
+    fit_horizons_in_pool,
+    predict_booster,
+    predict_joint,
+    resolve_device,
+    to_train_params
+)
+from src.utils import logger, share_array
 
 
 class XGBQuantileForecaster(QuantileForecaster):
@@ -30,10 +44,11 @@ class XGBQuantileForecaster(QuantileForecaster):
         super().__init__(f"xgb_h{horizon}", quantiles)
         self.horizon = horizon
         
-        # Default XGBoost parameters
+        # Default XGBoost parameters (GPU hist when a GPU is usable)
         self.xgb_params = {
             'objective': 'reg:quantileerror',
             'tree_method': 'hist',
+            'device': 'auto',
             'max_depth': 6,
             'learning_rate': 0.05,
             'n_estimators': 500,
@@ -49,11 +64,13 @@ class XGBQuantileForecaster(QuantileForecaster):
         
         # Update with user-provided parameters
         self.xgb_params.update(xgb_params)
+        self.xgb_params['device'] = resolve_device(self.xgb_params['device'])
     
     def create_target(
         self,
         df: pd.DataFrame,
-        target_column: str = 'log_return'
+        target_column: str = 'log_return',
+        grouped: Optional[SeriesGroupBy] = None
     ) -> pd.Series:
         """
         Create target variable for given horizon.
@@ -61,32 +78,46 @@ class XGBQuantileForecaster(QuantileForecaster):
         Args:
             df: DataFrame with returns
             target_column: Column to use as target
+            grouped: ``df[target_column]`` grouped by symbol, to reuse one
+                grouper across horizons (built from df if omitted)
             
         Returns:
             Target series shifted by horizon
         """
+        if grouped is None:
+            grouped = df.groupby('symbol', sort=False, observed=True)[target_column]
+        
         # Shift returns by horizon (negative shift = future values)
-        target = df.groupby('symbol')[target_column].shift(-self.horizon)
+        target = grouped.shift(-self.horizon)
         
         return target
     
     def fit(
         self,
-        X: pd.DataFrame,
+        X: Union[pd.DataFrame, np.ndarray],
         y: pd.Series,
         eval_set: Optional[List[tuple]] = None,
         early_stopping_rounds: int = 50,
-        verbose: bool = False
+        verbose: bool = False,
+        ref: Optional[xgb.DMatrix] = None,
+        feature_names: Optional[List[str]] = None
     ) -> 'XGBQuantileForecaster':
         """
-        Fit XGBoost models for all quantiles.
+        Fit one XGBoost model for all quantiles.
+        
+        A single booster is trained with the multi-quantile loss, so the
+        quantiles share tree structure and each leaf holds one value per
+        quantile. ``self.models`` keeps a per-quantile view of it.
         
         Args:
-            X: Feature matrix
+            X: Feature matrix, or a C-contiguous float32 array of it
             y: Target variable
             eval_set: Validation set for early stopping
             early_stopping_rounds: Early stopping rounds
             verbose: Verbose training
+            ref: Quantized matrix whose histogram cuts are reused instead
+                of sketching X again (see ``build_reference``)
+            feature_names: Column names of X (required when X is an array)
             
         Returns:
             self
@@ -94,44 +125,120 @@ class XGBQuantileForecaster(QuantileForecaster):
         logger.info(f"Training {self.model_name} for {len(self.quantiles)} quantiles...")
         
         # Store feature names
-        self.feature_names = X.columns.tolist()
+        if isinstance(X, pd.DataFrame):
+            self.feature_names = X.columns.tolist()
+            X = as_float32(X).to_numpy()
+        else:
+            if feature_names is None:
+                raise ValueError("feature_names is required when X is an array")
+            self.feature_names = list(feature_names)
+        
+        # Remove NaN targets (from shifting): one mask, then positional takes
+        y = np.asarray(y, dtype=np.float32)
+        valid_idx = np.flatnonzero(~np.isnan(y))
+        X_train = X.take(valid_idx, axis=0)
+        y_train = y.take(valid_idx)
+        
+        logger.info(f"Training samples: {len(X_train)} (removed {len(y) - len(valid_idx)} NaN targets)")
+        
+        # Build the quantized training matrix once
+        dtrain = xgb.QuantileDMatrix(
+            X_train,
+            y_train,
+            feature_names=self.feature_names,
+            max_bin=self.xgb_params.get('max_bin'),
+            ref=ref
+        )
+        
+        evals = []
+        if eval_set is not None:
+            for i, (X_eval, y_eval) in enumerate(eval_set):
+                deval = xgb.QuantileDMatrix(
+                    X_eval.to_numpy(dtype=np.float32),
+                    np.asarray(y_eval, dtype=np.float32),
+                    feature_names=self.feature_names,
+                    ref=dtrain
+                )
+                evals.append((deval, f"validation_{i}"))
+        
+        params, num_boost_round = to_train_params(self.xgb_params)
+        
+        # Train all quantiles jointly
+        booster = xgb.train(
+            {**params, 'quantile_alpha': list(self.quantiles)},
+            dtrain,
+            num_boost_round=num_boost_round,
+            evals=evals,
+            early_stopping_rounds=early_stopping_rounds if evals else None,
+            verbose_eval=verbose
+        )
+        
+        joint = BoosterRegressor(booster, self.feature_names)
+        self.models = {
+            quantile: QuantileView(joint, i)
+            for i, quantile in enumerate(self.quantiles)
+        }
         
-        # Remove NaN targets (from shifting)
-        valid_idx = ~y.isna()
-        X_train = X[valid_idx]
-        y_train = y[valid_idx]
+        self.is_fitted = True
+        logger.info(f"✓ {self.model_name} training complete")
         
-        logger.info(f"Training samples: {len(X_train)} (removed {(~valid_idx).sum()} NaN targets)")
+        return self
+    
+    def build_reference(
+        self,
+        X: Union[pd.DataFrame, np.ndarray],
+        feature_names: Optional[List[str]] = None
+    ) -> xgb.QuantileDMatrix:
+        """
+        Sketch histogram cuts for X, to be shared by fits on subsets of X.
         
-        # Train one model per quantile
-        for quantile in tqdm(self.quantiles, desc="Training quantiles"):
-            # Set quantile parameter
-            params = self.xgb_params.copy()
-            params['quantile_alpha'] = quantile
-            
-            # Create model
-            model = xgb.XGBRegressor(**params)
-            
-            # Fit model
-            if eval_set is not None:
-                model.fit(
-                    X_train,
-                    y_train,
-                    eval_set=eval_set,
-                    early_stopping_rounds=early_stopping_rounds,
-                    verbose=verbose
-                )
-            else:
-                model.fit(X_train, y_train, verbose=verbose)
+        Args:
+            X: Feature matrix (float32), as a DataFrame or a 2-D array
+            feature_names: Column names when X is an array
             
-            self.models[quantile] = model
+        Returns:
+            Label-less quantized matrix usable as ``fit(..., ref=...)``
+        """
+        return build_reference(X, self.xgb_params.get('max_bin'), feature_names)
+    
+    def predict(
+        self,
+        X: pd.DataFrame,
+        return_quantiles: bool = True
+    ) -> Dict[float, np.ndarray]:
+        """
+        Predict all quantiles.
+        
+        X is converted to a float32 array once and shared by every
+        booster. A jointly trained model is evaluated once for all
+        quantiles; models holding one booster per quantile are predicted
+        one by one on the same array.
+        
+        Args:
+            X: Feature matrix
+            return_quantiles: If True, return dict of quantiles
             
-            logger.debug(f"Trained quantile {quantile:.3f}")
+        Returns:
+            Dictionary mapping quantile -> predictions
+        """
+        if not self.is_fitted:
+            raise ValueError("Model not fitted yet")
         
-        self.is_fitted = True
-        logger.info(f"✓ {self.model_name} training complete")
+        if isinstance(X, pd.DataFrame):
+            X = X[self.feature_names].to_numpy(dtype=np.float32)
         
-        return self
+        joints = {id(getattr(model, 'joint', None)) for model in self.models.values()}
+        first = next(iter(self.models.values()), None)
+        
+        if len(joints) != 1 or not isinstance(first, QuantileView):
+            return {
+                quantile: predict_booster(model, X)
+                for quantile, model in self.models.items()
+            }
+        
+        preds = predict_joint(first.joint, X)
+        
+        return {quantile: preds[:, model.index] for quantile, model in self.models.items()}
     
     def get_feature_importance(self, quantile: float = 0.5) -> pd.DataFrame:
         """
@@ -159,6 +266,92 @@ class XGBQuantileForecaster(QuantileForecaster):
         }).sort_values('importance', ascending=False)
         
         return importance_df
+    
+    def save(self, path: Path) -> None:
+        """
+        Save boosters in XGBoost's native UBJSON format.
+        
+        ``xgb_h1.ubj`` holds the booster and ``xgb_h1.json`` the metadata
+        (feature names, quantiles and which booster output serves each
+        quantile). Paths with any other suffix are pickled as before.
+        
+        Args:
+            path: Path to save model
+        """
+        path = Path(path)
+        
+        if path.suffix != '.ubj':
+            return super().save(path)
+        
+        path.parent.mkdir(parents=True, exist_ok=True)
+        
+        files = {}
+        outputs = []
+        for quantile, model in self.models.items():
+            booster = model.get_booster()
+            if id(booster) not in files:
+                name = path.name if not files else f"{path.stem}_{len(files)}.ubj"
+                booster.save_model(path.with_name(name))
+                files[id(booster)] = name
+            outputs.append([files[id(booster)], getattr(model, 'index', None)])
+        
+        metadata = {
+            'model_name': self.model_name,
+            'horizon': self.horizon,
+            'feature_names': self.feature_names,
+            'quantiles': list(self.models),
+            'outputs': outputs,
+            'is_fitted': self.is_fitted
+        }
+        
+        with open(path.with_suffix('.json'), 'w') as f:
+            json.dump(metadata, f, indent=2)
+        
+        logger.info(f"Saved quantile models to {path}")
+    
+    def load(self, path: Path) -> 'XGBQuantileForecaster':
+        """
+        Load models saved with ``save``; pickles are loaded as before.
+        
+        Args:
+            path: Path to load model from
+            
+        Returns:
+            self
+        """
+        path = Path(path)
+        
+        if path.suffix != '.ubj':
+            return super().load(path)
+        
+        if not path.exists():
+            raise FileNotFoundError(f"Model not found: {path}")
+        
+        with open(path.with_suffix('.json')) as f:
+            metadata = json.load(f)
+        
+        regressors = {}
+        for name, _ in metadata['outputs']:
+            if name not in regressors:
+                booster = xgb.Booster()
+                booster.load_model(path.with_name(name))
+                # Predict where this machine can, whatever device trained it
+                booster.set_param({'device': resolve_device()})
+                regressors[name] = BoosterRegressor(booster, metadata['feature_names'])
+        
+        self.models = {
+            quantile: regressors[name] if index is None else QuantileView(regressors[name], index)
+            for quantile, (name, index) in zip(metadata['quantiles'], metadata['outputs'])
+        }
+        self.feature_names = metadata['feature_names']
+        self.model_name = metadata['model_name']
+        self.horizon = metadata['horizon']
+        self.quantiles = metadata['quantiles']
+        self.is_fitted = metadata['is_fitted']
+        
+        logger.info(f"Loaded quantile models from {path}")
+        
+        return self
 
 
 class MultiHorizonForecaster:
@@ -168,6 +361,7 @@ class MultiHorizonForecaster:
         self,
         horizons: List[int] = [1, 2, 3, 4, 5],
         quantiles: List[float] = [0.025, 0.1, 0.5, 0.9, 0.975],
+        n_workers: Optional[int] = 1,
         **xgb_params
     ):
         """
@@ -176,10 +370,15 @@ class MultiHorizonForecaster:
         Args:
             horizons: List of forecast horizons
             quantiles: List of quantiles to predict
+            n_workers: Processes training horizons in parallel (default 1:
+                sequentially in-process, sharing one set of histogram
+                cuts; None: one per horizon, up to ``n_jobs`` or the CPU
+                count)
             **xgb_params: XGBoost parameters
         """
         self.horizons = horizons
         self.quantiles = quantiles
+        self.n_workers = n_workers
         self.xgb_params = xgb_params
         self.models = {}  # horizon -> XGBQuantileForecaster
     
@@ -188,6 +387,8 @@ class MultiHorizonForecaster:
         df: pd.DataFrame,
         feature_columns: List[str],
         target_column: str = 'log_return',
+        X: Optional[np.ndarray] = None,
+        ref: Optional[xgb.DMatrix] = None,
         **fit_kwargs
     ) -> 'MultiHorizonForecaster':
         """
@@ -197,6 +398,11 @@ class MultiHorizonForecaster:
             df: DataFrame with features and target
             feature_columns: List of feature column names
             target_column: Target column name
+            X: ``df[feature_columns]`` already materialized as a
+                C-contiguous float32 array, e.g. shared with the volume
+                forecaster (built from df if omitted)
+            ref: Histogram cuts of X to reuse on the sequential path
+                (sketched once per fit if omitted)
             **fit_kwargs: Additional fit arguments
             
         Returns:
@@ -208,8 +414,64 @@ class MultiHorizonForecaster:
         logger.info(f"Quantiles: {self.quantiles}")
         logger.info("=" * 60)
         
-        X = df[feature_columns]
+        # Materialize once; every horizon trains on rows of the same
+        # C-contiguous float32 array
+        if X is None:
+            X = np.ascontiguousarray(as_float32(df[feature_columns]).to_numpy())
+        
+        # One grouper serves every horizon's target
+        grouped = df.groupby('symbol', sort=False, observed=True)[target_column]
+        
+        n_cpus = cpu_budget(self.xgb_params)
+        n_workers = min(self.n_workers or n_cpus, len(self.horizons))
+        
+        # Worker processes would only contend for the same GPU
+        if resolve_device(self.xgb_params.get('device', 'auto')) != 'cpu':
+            n_workers = 1
         
+        if n_workers > 1:
+            targets = {
+                horizon: XGBQuantileForecaster(horizon=horizon)
+                .create_target(df, target_column, grouped)
+                .to_numpy(dtype=np.float32)
+                for horizon in self.horizons
+            }
+            
+            # Workers map the shared copy; drop this call's reference so a
+            # matrix built here is not held twice
+            shm, spec = share_array(X)
+            del X
+            self.models.update(fit_horizons_in_pool(
+                XGBQuantileForecaster,
+                {'quantiles': self.quantiles},
+                self.xgb_params,
+                shm,
+                spec,
+                feature_columns,
+                targets,
+                n_workers,
+                fit_kwargs=fit_kwargs
+            ))
+        else:
+            self._fit_sequential(df, X, feature_columns, target_column, grouped, ref, fit_kwargs)
+        
+        logger.info("\n" + "=" * 60)
+        logger.info("✓ Multi-Horizon Training Complete!")
+        logger.info("=" * 60)
+        
+        return self
+    
+    def _fit_sequential(
+        self,
+        df: pd.DataFrame,
+        X: np.ndarray,
+        feature_columns: List[str],
+        target_column: str,
+        grouped: SeriesGroupBy,
+        ref: Optional[xgb.DMatrix],
+        fit_kwargs: Dict
+    ) -> None:
+        """Fit horizons one after another, sharing histogram cuts."""
         for horizon in self.horizons:
             logger.info(f"\nTraining horizon {horizon}...")
             
@@ -221,18 +483,16 @@ class MultiHorizonForecaster:
             )
             
             # Create target
-            y = forecaster.create_target(df, target_column)
+            y = forecaster.create_target(df, target_column, grouped)
+            
+            # Features are identical across horizons: sketch the cuts once
+            if ref is None:
+                ref = forecaster.build_reference(X, feature_columns)
             
             # Fit
-            forecaster.fit(X, y, **fit_kwargs)
+            forecaster.fit(X, y, ref=ref, feature_names=feature_columns, **fit_kwargs)
             
             self.models[horizon] = forecaster
-        
-        logger.info("\n" + "=" * 60)
-        logger.info("✓ Multi-Horizon Training Complete!")
-        logger.info("=" * 60)
-        
-        return self
     
     def predict(
         self,
@@ -303,13 +563,11 @@ class MultiHorizonForecaster:
         Args:
             output_dir: Output directory
         """
-        from pathlib import Path
-        
         output_dir = Path(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
         
         for horizon, model in self.models.items():
-            model_path = output_dir / f"xgb_h{horizon}.pkl"
+            model_path = output_dir / f"xgb_h{horizon}.ubj"
             model.save(model_path)
         
         logger.info(f"Saved {len(self.models)} models to {output_dir}")
@@ -318,18 +576,21 @@ class MultiHorizonForecaster:
         """
         Load all horizon models.
         
+        Native ``.ubj`` models are preferred; pickled ``.pkl`` models from
+        earlier versions are loaded when no native model exists.
+        
         Args:
             input_dir: Input directory
             
         Returns:
             self
         """
-        from pathlib import Path
-        
         input_dir = Path(input_dir)
         
         for horizon in self.horizons:
-            model_path = input_dir / f"xgb_h{horizon}.pkl"
+            model_path = input_dir / f"xgb_h{horizon}.ubj"
+            if not model_path.exists():
+                model_path = model_path.with_suffix('.pkl')
             
             if not model_path.exists():
                 logger.warning(f"Model not found: {model_path}")
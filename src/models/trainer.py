@@ -1,17 +1,63 @@
 """Training orchestrator for BVMT forecasting models."""
 
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
+import xgboost as xgb
 import sys
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from src.models.price_forecaster import MultiHorizonForecaster
+from src.models.booster import as_float32, build_reference, cpu_budget, resolve_device
 from src.models.volume_forecaster import MultiHorizonVolumeForecaster
-from src.utils import logger, config
+from src.utils import logger, config, share_array, attach_array
+from src.utils.parallel import ArraySpec
+
+
+# Columns that are never model inputs (metadata, raw prices, targets, labels)
+EXCLUDE_COLUMNS = frozenset({
+    'date', 'symbol', 'name', 'group',
+    'open', 'high', 'low', 'close',
+    'volume', 'num_trades', 'turnover',
+    'adj_close', 'adj_open', 'adj_high', 'adj_low',
+    'log_return', 'log_return_raw',
+    'liquidity_regime', 'volatility_regime'
+})
+
+# Non-feature columns training still needs (split key, grouping, targets)
+TRAINING_COLUMNS = ['date', 'symbol', 'volume', 'log_return']
+
+
+def _train_in_process(
+    trainer: 'ModelTrainer',
+    method: str,
+    train_df: pd.DataFrame,
+    feature_columns: List[str],
+    spec: ArraySpec,
+    n_jobs: int
+):
+    """Run one of the trainer's train_* methods on the shared feature matrix and return the forecaster."""
+    trainer.config = {**trainer.config, 'xgb_n_jobs': n_jobs}
+    
+    shm, X = attach_array(spec)
+    try:
+        ref = build_reference(X, feature_names=feature_columns) if trainer._fits_horizons_in_process() else None
+        getattr(trainer, method)(train_df, None, feature_columns, X=X, ref=ref)
+        del ref
+    finally:
+        del X
+        shm.close()
+    
+    return trainer.price_forecaster if method == 'train_price_models' else trainer.volume_forecaster
 
 
 class ModelTrainer:
@@ -38,10 +84,17 @@ class ModelTrainer:
         self.price_forecaster = None
         self.volume_forecaster = None
     
-    def load_features(self) -> pd.DataFrame:
+    def load_features(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
         """
         Load feature matrix.
         
+        Only the columns training uses are read from the file: numeric
+        feature columns plus the split, grouping and target columns.
+        Reads go through a Feather cache (see ``_load_features_cached``).
+        
+        Args:
+            columns: Columns to read (default: the columns training uses)
+            
         Returns:
             DataFrame with features
         """
@@ -52,7 +105,24 @@ class ModelTrainer:
         if not features_path.exists():
             raise FileNotFoundError(f"Features not found: {features_path}")
         
-        df = pd.read_parquet(features_path)
+        if columns is None:
+            schema = pq.read_schema(features_path, memory_map=True)
+            columns = [
+                field.name for field in schema
+                if field.name in TRAINING_COLUMNS
+                or (field.name not in EXCLUDE_COLUMNS
+                    and (pa.types.is_integer(field.type)
+                         or pa.types.is_floating(field.type)
+                         or pa.types.is_boolean(field.type)))
+            ]
+        
+        table = self._load_features_cached(features_path, columns)
+        
+        # Release Arrow buffers column by column as pandas takes them over
+        df = table.to_pandas(self_destruct=True, split_blocks=True)
+        del table
+        
+        df = self._shrink(df)
         
         logger.info(f"Loaded features: {len(df)} rows, {len(df.columns)} columns")
         logger.info(f"Date range: {df['date'].min()} to {df['date'].max()}")
@@ -60,6 +130,111 @@ class ModelTrainer:
         
         return df
     
+    @staticmethod
+    def _load_features_cached(features_path: Path, columns: List[str]) -> pa.Table:
+        """
+        Read feature columns through an Arrow IPC (Feather v2) cache.
+        
+        The cache sits next to the Parquet file and is rebuilt whenever
+        the Parquet file is newer. Feather maps straight into Arrow
+        buffers, so repeat loads skip Parquet's decoding.
+        
+        Args:
+            features_path: Path to features.parquet
+            columns: Columns to read
+            
+        Returns:
+            Arrow table with the requested columns
+        """
+        cache_path = features_path.with_suffix('.feather')
+        
+        if (not cache_path.exists()
+                or cache_path.stat().st_mtime < features_path.stat().st_mtime):
+            table = pq.read_table(features_path, memory_map=True, use_threads=True, pre_buffer=True)
+            
+            # Write then rename, so a crashed write never leaves a bad cache
+            tmp_path = cache_path.with_suffix('.feather.tmp')
+            try:
+                feather.write_feather(table, tmp_path, compression='zstd', compression_level=3)
+                tmp_path.replace(cache_path)
+                logger.info(f"Cached features as Feather: {cache_path}")
+            except OSError as e:
+                logger.warning(f"Could not cache features as Feather: {e}")
+                return table.select(columns)
+        
+        return feather.read_table(cache_path, columns=columns, memory_map=True)
+    
+    @staticmethod
+    def _shrink(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Downcast the loaded frame to the narrowest dtypes training needs.
+        
+        Floats become float32 (XGBoost bins features in float32 anyway),
+        integers the smallest signed width holding their range, and string
+        columns categoricals. All casts happen in a single ``astype``.
+        
+        Args:
+            df: Loaded DataFrame
+            
+        Returns:
+            Downcast DataFrame
+        """
+        dtypes = {}
+        
+        for col, dtype in df.dtypes.items():
+            if dtype.kind == 'f' and dtype != np.float32:
+                dtypes[col] = np.float32
+            elif dtype.kind in 'iu' and len(df):
+                low, high = df[col].min(), df[col].max()
+                for candidate in (np.int8, np.int16, np.int32, np.int64):
+                    info = np.iinfo(candidate)
+                    if info.min <= low and high <= info.max:
+                        break
+                if candidate != dtype:
+                    dtypes[col] = candidate
+            elif dtype == object:
+                dtypes[col] = 'category'
+        
+        before = df.memory_usage(deep=True).sum()
+        df = df.astype(dtypes)
+        after = df.memory_usage(deep=True).sum()
+        
+        logger.info(f"Downcast {len(dtypes)} columns: {before / 1e6:.0f} MB -> {after / 1e6:.0f} MB")
+        
+        return df
+    
+    @staticmethod
+    def _replace_inf(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Replace +/-inf with NaN in float columns.
+        
+        Only columns that actually contain infinities are rewritten, so
+        unlike ``DataFrame.replace`` the rest of the frame is not copied.
+        
+        Args:
+            df: DataFrame with features
+            
+        Returns:
+            DataFrame without infinite values
+        """
+        # Shallow copy: replacing a column below never writes to the input
+        df = df.copy(deep=False)
+        n_replaced = 0
+        
+        for col, dtype in df.dtypes.items():
+            if dtype.kind != 'f':
+                continue
+            values = df[col].to_numpy()
+            inf_mask = np.isinf(values)
+            if inf_mask.any():
+                df[col] = np.where(inf_mask, np.nan, values).astype(dtype, copy=False)
+                n_replaced += 1
+        
+        if n_replaced:
+            logger.info(f"Replaced infinite values in {n_replaced} columns")
+        
+        return df
+    
     def create_train_test_split(
         self,
         df: pd.DataFrame,
@@ -75,23 +250,35 @@ class ModelTrainer:
         Returns:
             (train_df, test_df)
         """
-        # Sort by date
-        df = df.sort_values('date')
+        # Stable sort keeps each symbol's rows in order within a date
+        df = df.sort_values('date', kind='mergesort', ignore_index=True)
         
-        # Calculate split point
+        # Calculate split point, moved back to the first row of the split
+        # date so no trading day straddles train and test
         split_idx = int(len(df) * (1 - test_size))
-        split_date = df.iloc[split_idx]['date']
+        dates = df['date'].to_numpy()
+        if split_idx < len(dates):
+            split_idx = int(dates.searchsorted(dates[split_idx], side='left'))
         
-        # Split
-        train_df = df[df['date'] < split_date].copy()
-        test_df = df[df['date'] >= split_date].copy()
+        # Split (positional slices; the training code only reads them)
+        train_df = df.iloc[:split_idx]
+        test_df = df.iloc[split_idx:]
         
+        # Both halves are sorted, so their date ranges are their end rows
         logger.info(f"Train/Test Split:")
-        logger.info(f"  Train: {len(train_df)} rows ({train_df['date'].min()} to {train_df['date'].max()})")
-        logger.info(f"  Test:  {len(test_df)} rows ({test_df['date'].min()} to {test_df['date'].max()})")
+        logger.info(f"  Train: {len(train_df)} rows ({self._date_span(train_df)})")
+        logger.info(f"  Test:  {len(test_df)} rows ({self._date_span(test_df)})")
         
         return train_df, test_df
     
+    @staticmethod
+    def _date_span(df: pd.DataFrame) -> str:
+        """Describe the date range of a date-sorted frame without scanning it."""
+        if df.empty:
+            return "empty"
+        
+        return f"{df['date'].iat[0]} to {df['date'].iat[-1]}"
+    
     def get_feature_columns(self, df: pd.DataFrame) -> List[str]:
         """
         Get list of feature columns (exclude metadata).
@@ -102,22 +289,13 @@ class ModelTrainer:
         Returns:
             List of feature column names
         """
-        # Exclude metadata columns
-        exclude_cols = [
-            'date', 'symbol', 'name', 'group',
-            'open', 'high', 'low', 'close',
-            'volume', 'num_trades', 'turnover',
-            'adj_close', 'adj_open', 'adj_high', 'adj_low',
-            'log_return', 'log_return_raw',
-            'liquidity_regime', 'volatility_regime'
+        # Exclude metadata and keep numeric/bool columns only to avoid
+        # XGBoost errors with object/string/categorical columns
+        feature_cols = [
+            col for col, dtype in df.dtypes.items()
+            if col not in EXCLUDE_COLUMNS and dtype.kind in 'fiub'
         ]
         
-        feature_cols = [col for col in df.columns if col not in exclude_cols]
-        
-        # Filter for numeric columns only to avoid XGBoost errors with object/string columns
-        numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
-        feature_cols = [col for col in feature_cols if col in numeric_cols]
-        
         logger.info(f"Feature columns: {len(feature_cols)}")
         
         return feature_cols
@@ -126,7 +304,9 @@ class ModelTrainer:
         self,
         train_df: pd.DataFrame,
         test_df: pd.DataFrame,
-        feature_columns: List[str]
+        feature_columns: List[str],
+        X: Optional[np.ndarray] = None,
+        ref: Optional[xgb.DMatrix] = None
     ) -> None:
         """
         Train price forecasting models.
@@ -135,6 +315,9 @@ class ModelTrainer:
             train_df: Training data
             test_df: Test data
             feature_columns: List of feature columns
+            X: Shared float32 feature matrix of train_df (see
+                ``_feature_matrix``; built by the forecaster if omitted)
+            ref: Shared histogram cuts of X
         """
         logger.info("\n" + "=" * 60)
         logger.info("Training Price Forecasting Models")
@@ -149,13 +332,16 @@ class ModelTrainer:
             'learning_rate': self.config.get('xgb_learning_rate', 0.05),
             'n_estimators': self.config.get('xgb_n_estimators', 500),
             'subsample': self.config.get('xgb_subsample', 0.8),
-            'colsample_bytree': self.config.get('xgb_colsample_bytree', 0.8)
+            'colsample_bytree': self.config.get('xgb_colsample_bytree', 0.8),
+            'device': self.config.get('xgb_device', 'auto'),
+            'n_jobs': self.config.get('xgb_n_jobs', -1)
         }
         
         # Create forecaster
         self.price_forecaster = MultiHorizonForecaster(
             horizons=horizons,
             quantiles=quantiles,
+            n_workers=self.config.get('horizon_workers', 1),
             **xgb_params
         )
         
@@ -163,7 +349,9 @@ class ModelTrainer:
         self.price_forecaster.fit(
             train_df,
             feature_columns=feature_columns,
-            target_column='log_return'
+            target_column='log_return',
+            X=X,
+            ref=ref
         )
         
         # Save
@@ -176,7 +364,9 @@ class ModelTrainer:
         self,
         train_df: pd.DataFrame,
         test_df: pd.DataFrame,
-        feature_columns: List[str]
+        feature_columns: List[str],
+        X: Optional[np.ndarray] = None,
+        ref: Optional[xgb.DMatrix] = None
     ) -> None:
         """
         Train volume forecasting models.
@@ -185,6 +375,9 @@ class ModelTrainer:
             train_df: Training data
             test_df: Test data
             feature_columns: List of feature columns
+            X: Shared float32 feature matrix of train_df (see
+                ``_feature_matrix``; built by the forecaster if omitted)
+            ref: Shared histogram cuts of X
         """
         logger.info("\n" + "=" * 60)
         logger.info("Training Volume Forecasting Models")
@@ -198,12 +391,15 @@ class ModelTrainer:
             'learning_rate': self.config.get('volume_xgb_learning_rate', 0.05),
             'n_estimators': self.config.get('volume_xgb_n_estimators', 300),
             'subsample': self.config.get('volume_xgb_subsample', 0.8),
-            'colsample_bytree': self.config.get('volume_xgb_colsample_bytree', 0.8)
+            'colsample_bytree': self.config.get('volume_xgb_colsample_bytree', 0.8),
+            'device': self.config.get('xgb_device', 'auto'),
+            'n_jobs': self.config.get('xgb_n_jobs', -1)
         }
         
         # Create forecaster
         self.volume_forecaster = MultiHorizonVolumeForecaster(
             horizons=horizons,
+            n_workers=self.config.get('horizon_workers', 1),
             **xgb_params
         )
         
@@ -211,7 +407,9 @@ class ModelTrainer:
         self.volume_forecaster.fit(
             train_df,
             feature_columns=feature_columns,
-            volume_column='volume'
+            volume_column='volume',
+            X=X,
+            ref=ref
         )
         
         # Save
@@ -220,6 +418,94 @@ class ModelTrainer:
         
         logger.info(f"✓ Volume models saved to {volume_models_dir}")
     
+    @staticmethod
+    def _feature_matrix(
+        train_df: pd.DataFrame,
+        feature_columns: List[str],
+        with_reference: bool = True
+    ) -> Tuple[np.ndarray, Optional[xgb.QuantileDMatrix]]:
+        """
+        Materialize the training features once for every forecaster.
+        
+        Args:
+            train_df: Training data
+            feature_columns: List of feature columns
+            with_reference: Also sketch the histogram cuts (only used when
+                horizons fit in-process, see ``_fits_horizons_in_process``)
+            
+        Returns:
+            (C-contiguous float32 feature matrix, its histogram cuts or None)
+        """
+        X = np.ascontiguousarray(as_float32(train_df[feature_columns]).to_numpy())
+        ref = build_reference(X, feature_names=feature_columns) if with_reference else None
+        
+        return X, ref
+    
+    def _fits_horizons_in_process(self) -> bool:
+        """Whether the forecasters fit their horizons sequentially, and so take shared cuts."""
+        n_workers = self.config.get('horizon_workers', 1)
+        n_horizons = len(self.config.get('horizons', [1, 2, 3, 4, 5]))
+        n_workers = min(n_workers or cpu_budget({'n_jobs': self.config.get('xgb_n_jobs', -1)}), n_horizons)
+        
+        # Forecasters drop to one worker on a GPU
+        return n_workers <= 1 or resolve_device(self.config.get('xgb_device', 'auto')) != 'cpu'
+    
+    def _can_train_in_parallel(self) -> bool:
+        """Whether price and volume models should train in separate processes (opt-in)."""
+        return (
+            self.config.get('parallel_train', False)
+            and (os.cpu_count() or 1) > 1
+            # Two processes would only contend for the same GPU
+            and resolve_device(self.config.get('xgb_device', 'auto')) == 'cpu'
+        )
+    
+    def _train_in_parallel(
+        self,
+        train_df: pd.DataFrame,
+        feature_columns: List[str]
+    ) -> None:
+        """
+        Train price and volume models in two spawned processes.
+        
+        The float32 feature matrix is built once and placed in shared
+        memory; each process maps it, sketches its histogram cuts and only
+        receives the non-feature columns of train_df. Each process gets
+        half of the CPUs as its thread budget, saves its models and
+        returns the fitted forecaster.
+        
+        Args:
+            train_df: Training data
+            feature_columns: List of feature columns
+        """
+        n_jobs = max(1, (os.cpu_count() or 1) // 2)
+        
+        logger.info(f"Training price and volume models in parallel ({n_jobs} threads each)")
+        
+        X = np.ascontiguousarray(as_float32(train_df[feature_columns]).to_numpy())
+        shm, spec = share_array(X)
+        del X
+        
+        # Targets and grouping only: the features travel through shared memory
+        targets_df = train_df[[c for c in TRAINING_COLUMNS if c in train_df.columns]]
+        
+        try:
+            with ProcessPoolExecutor(
+                max_workers=2,
+                mp_context=multiprocessing.get_context('spawn')
+            ) as executor:
+                price = executor.submit(
+                    _train_in_process, self, 'train_price_models', targets_df, feature_columns, spec, n_jobs
+                )
+                volume = executor.submit(
+                    _train_in_process, self, 'train_volume_models', targets_df, feature_columns, spec, n_jobs
+                )
+                
+                self.price_forecaster = price.result()
+                self.volume_forecaster = volume.result()
+        finally:
+            shm.close()
+            shm.unlink()
+    
     def run(self) -> None:
         """Run complete training pipeline."""
         logger.info("=" * 60)
@@ -230,7 +516,7 @@ class ModelTrainer:
         df = self.load_features()
         
         # Sanitize features (replace inf with nan)
-        df = df.replace([np.inf, -np.inf], np.nan)
+        df = self._replace_inf(df)
         
         # Create train/test split
         train_df, test_df = self.create_train_test_split(df)
@@ -238,11 +524,20 @@ class ModelTrainer:
         # Get feature columns
         feature_columns = self.get_feature_columns(df)
         
-        # Train price models
-        self.train_price_models(train_df, test_df, feature_columns)
-        
-        # Train volume models
-        self.train_volume_models(train_df, test_df, feature_columns)
+        if self._can_train_in_parallel():
+            # Price and volume models share no state: train them side by side
+            self._train_in_parallel(train_df, feature_columns)
+        else:
+            # Price and volume models train on the same matrix and cuts
+            X, ref = self._feature_matrix(
+                train_df, feature_columns, with_reference=self._fits_horizons_in_process()
+            )
+            
+            # Train price models
+            self.train_price_models(train_df, test_df, feature_columns, X=X, ref=ref)
+            
+            # Train volume models
+            self.train_volume_models(train_df, test_df, feature_columns, X=X, ref=ref)
         
         logger.info("\n" + "=" * 60)
         logger.info("✓ Model Training Pipeline Complete!")
@@ -1,12 +1,26 @@
 """Volume forecasting model with liquidity classification."""
 
+import json
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Tuple
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+from pandas.core.groupby import SeriesGroupBy
 import xgboost as xgb
 
 from src.models.base import BaseForecaster
-from src.utils import logger
+from src.models.booster import (
+    BoosterRegressor,
+    as_float32,
+    build_reference,
+    cpu_budget,
+    fit_horizons_in_pool,
+    predict_booster,
+    resolve_device,
+    to_train_params
+)
+from src.utils import logger, share_array
 
 
 class VolumeForecaster(BaseForecaster):
@@ -27,10 +41,11 @@ class VolumeForecaster(BaseForecaster):
         super().__init__(f"volume_h{horizon}")
         self.horizon = horizon
         
-        # Default XGBoost parameters for volume
+        # Default XGBoost parameters for volume (GPU hist when a GPU is usable)
         self.xgb_params = {
             'objective': 'reg:squarederror',
             'tree_method': 'hist',
+            'device': 'auto',
             'max_depth': 5,
             'learning_rate': 0.05,
             'n_estimators': 300,
@@ -46,6 +61,7 @@ class VolumeForecaster(BaseForecaster):
         
         # Update with user-provided parameters
         self.xgb_params.update(xgb_params)
+        self.xgb_params['device'] = resolve_device(self.xgb_params['device'])
         
         # Liquidity thresholds (will be set during training)
         self.q20_threshold = None
@@ -54,7 +70,8 @@ class VolumeForecaster(BaseForecaster):
     def create_target(
         self,
         df: pd.DataFrame,
-        target_column: str = 'volume'
+        target_column: str = 'volume',
+        grouped: Optional[SeriesGroupBy] = None
     ) -> pd.Series:
         """
         Create target variable for given horizon.
@@ -64,40 +81,46 @@ class VolumeForecaster(BaseForecaster):
         Args:
             df: DataFrame with volume
             target_column: Column to use as target
+            grouped: log1p of ``df[target_column]`` grouped by symbol, to
+                reuse one grouper across horizons (built from df if omitted)
             
         Returns:
             Target series shifted by horizon
         """
-        # Use log volume for better distribution
-        log_volume = np.log1p(df[target_column])
+        if grouped is None:
+            # Use log volume for better distribution
+            log_volume = np.log1p(df[target_column])
+            grouped = log_volume.groupby(df['symbol'], sort=False, observed=True)
         
         # Shift by horizon
-        target = df.groupby('symbol')[target_column].shift(-self.horizon)
-        
-        # Convert to log
-        target = np.log1p(target)
+        target = grouped.shift(-self.horizon)
         
         return target
     
     def fit(
         self,
-        X: pd.DataFrame,
+        X: Union[pd.DataFrame, np.ndarray],
         y: pd.Series,
         volume_data: pd.Series,
         eval_set: Optional[List[tuple]] = None,
         early_stopping_rounds: int = 50,
-        verbose: bool = False
+        verbose: bool = False,
+        ref: Optional[xgb.DMatrix] = None,
+        feature_names: Optional[List[str]] = None
     ) -> 'VolumeForecaster':
         """
         Fit volume forecasting model.
         
         Args:
-            X: Feature matrix
+            X: Feature matrix, or a C-contiguous float32 array of it
             y: Target variable (log volume)
             volume_data: Original volume data for threshold calculation
             eval_set: Validation set for early stopping
             early_stopping_rounds: Early stopping rounds
             verbose: Verbose training
+            ref: Quantized matrix whose histogram cuts are reused instead
+                of sketching X again (see ``build_reference``)
+            feature_names: Column names of X (required when X is an array)
             
         Returns:
             self
@@ -105,41 +128,83 @@ class VolumeForecaster(BaseForecaster):
         logger.info(f"Training {self.model_name}...")
         
         # Store feature names
-        self.feature_names = X.columns.tolist()
+        if isinstance(X, pd.DataFrame):
+            self.feature_names = X.columns.tolist()
+            X = as_float32(X).to_numpy()
+        else:
+            if feature_names is None:
+                raise ValueError("feature_names is required when X is an array")
+            self.feature_names = list(feature_names)
         
-        # Remove NaN targets
-        valid_idx = ~y.isna()
-        X_train = X[valid_idx]
-        y_train = y[valid_idx]
+        # Remove NaN targets: one mask, then positional takes
+        y = np.asarray(y, dtype=np.float32)
+        valid_idx = np.flatnonzero(~np.isnan(y))
+        X_train = X.take(valid_idx, axis=0)
+        y_train = y.take(valid_idx)
         
         logger.info(f"Training samples: {len(X_train)}")
         
-        # Calculate liquidity thresholds from training data
-        self.q20_threshold = volume_data[valid_idx].quantile(0.20)
-        self.q80_threshold = volume_data[valid_idx].quantile(0.80)
+        # Calculate liquidity thresholds from training data (NaN volumes
+        # ignored, as pandas' quantile does)
+        volume_train = np.asarray(volume_data, dtype=np.float64).take(valid_idx)
+        self.q20_threshold, self.q80_threshold = np.nanquantile(volume_train, [0.20, 0.80])
         
         logger.info(f"Liquidity thresholds: Q20={self.q20_threshold:.0f}, Q80={self.q80_threshold:.0f}")
         
-        # Create model
-        self.model = xgb.XGBRegressor(**self.xgb_params)
+        # Quantized training matrix (cuts shared with other horizons via ref)
+        dtrain = xgb.QuantileDMatrix(
+            X_train,
+            y_train,
+            feature_names=self.feature_names,
+            max_bin=self.xgb_params.get('max_bin'),
+            ref=ref
+        )
         
-        # Fit model
+        evals = []
         if eval_set is not None:
-            self.model.fit(
-                X_train,
-                y_train,
-                eval_set=eval_set,
-                early_stopping_rounds=early_stopping_rounds,
-                verbose=verbose
-            )
-        else:
-            self.model.fit(X_train, y_train, verbose=verbose)
+            for i, (X_eval, y_eval) in enumerate(eval_set):
+                deval = xgb.QuantileDMatrix(
+                    X_eval.to_numpy(dtype=np.float32),
+                    np.asarray(y_eval, dtype=np.float32),
+                    feature_names=self.feature_names,
+                    ref=dtrain
+                )
+                evals.append((deval, f"validation_{i}"))
+        
+        params, num_boost_round = to_train_params(self.xgb_params)
+        
+        booster = xgb.train(
+            params,
+            dtrain,
+            num_boost_round=num_boost_round,
+            evals=evals,
+            early_stopping_rounds=early_stopping_rounds if evals else None,
+            verbose_eval=verbose
+        )
+        self.model = BoosterRegressor(booster, self.feature_names)
         
         self.is_fitted = True
         logger.info(f"✓ {self.model_name} training complete")
         
         return self
     
+    def build_reference(
+        self,
+        X: Union[pd.DataFrame, np.ndarray],
+        feature_names: Optional[List[str]] = None
+    ) -> xgb.QuantileDMatrix:
+        """
+        Sketch histogram cuts for X, to be shared by fits on subsets of X.
+        
+        Args:
+            X: Feature matrix (float32), as a DataFrame or a 2-D array
+            feature_names: Column names when X is an array
+            
+        Returns:
+            Label-less quantized matrix usable as ``fit(..., ref=...)``
+        """
+        return build_reference(X, self.xgb_params.get('max_bin'), feature_names)
+    
     def predict(
         self,
         X: pd.DataFrame,
@@ -148,6 +213,9 @@ class VolumeForecaster(BaseForecaster):
         """
         Predict volume.
         
+        X is converted to a float32 array and passed to the booster's
+        ``inplace_predict``, so no DMatrix is built.
+        
         Args:
             X: Feature matrix
             return_log: If True, return log(volume), else return volume
@@ -158,8 +226,11 @@ class VolumeForecaster(BaseForecaster):
         if not self.is_fitted:
             raise ValueError("Model not fitted yet")
         
+        if isinstance(X, pd.DataFrame):
+            X = X[self.feature_names].to_numpy(dtype=np.float32)
+        
         # Predict log volume
-        log_volume_pred = self.model.predict(X)
+        log_volume_pred = predict_booster(self.model, X)
         
         if return_log:
             return log_volume_pred
@@ -179,23 +250,24 @@ class VolumeForecaster(BaseForecaster):
             
         Returns:
             (volume_predictions, regime_labels)
-            regime_labels: 0=Low, 1=Normal, 2=High
+            regime_labels (int8): 0=Low, 1=Normal, 2=High
         """
-        # Predict volume
-        volume_pred = self.predict(X, return_log=False)
-        
-        # Classify regime
-        # Classify regime
-        regime = np.ones(len(volume_pred), dtype=int)  # Default: Normal
-        
+        # Predict log volume (the model's own scale)
+        log_volume_pred = self.predict(X, return_log=True)
+        
+        # Classify regime in one pass: below Q20 -> 0 (Low), above Q80 ->
+        # 2 (High), otherwise 1 (Normal). log1p is monotonic, so comparing
+        # in log space against float32 edges keeps the predictions in
+        # float32. The upper edge is nudged past Q80 so a prediction equal
+        # to Q80 stays Normal.
         if self.q20_threshold is not None and self.q80_threshold is not None:
-            regime[volume_pred < self.q20_threshold] = 0  # Low
-            regime[volume_pred > self.q80_threshold] = 2  # High
+            log_q20, log_q80 = np.log1p([self.q20_threshold, self.q80_threshold]).astype(np.float32)
+            edges = np.array([log_q20, np.nextafter(log_q80, np.float32(np.inf))], dtype=log_volume_pred.dtype)
+            regime = np.digitize(log_volume_pred, edges).astype(np.int8, copy=False)
         else:
-            # Only warn once per prediction batch to avoid spam
-            pass
+            regime = np.ones(len(log_volume_pred), dtype=np.int8)  # Default: Normal
         
-        return volume_pred, regime
+        return np.expm1(log_volume_pred), regime
     
     def get_regime_name(self, regime_code: int) -> str:
         """
@@ -207,14 +279,42 @@ class VolumeForecaster(BaseForecaster):
         Returns:
             Regime name
         """
-    def save(self, path: "Path") -> None:
-        """Save model and thresholds."""
-        from pathlib import Path
+    def save(self, path: Path) -> None:
+        """
+        Save model and thresholds.
+        
+        ``volume_h1.ubj`` holds the booster in XGBoost's native UBJSON
+        format and ``volume_h1.json`` the metadata (feature names,
+        thresholds, parameters). Paths with any other suffix are pickled
+        as before.
+        
+        Args:
+            path: Path to save model
+        """
         import joblib
         
         path = Path(path)
         path.parent.mkdir(parents=True, exist_ok=True)
         
+        if path.suffix == '.ubj':
+            self.model.get_booster().save_model(path)
+            
+            metadata = {
+                'model_name': self.model_name,
+                'horizon': self.horizon,
+                'feature_names': self.feature_names,
+                'q20_threshold': None if self.q20_threshold is None else float(self.q20_threshold),
+                'q80_threshold': None if self.q80_threshold is None else float(self.q80_threshold),
+                'xgb_params': self.xgb_params,
+                'is_fitted': self.is_fitted
+            }
+            
+            with open(path.with_suffix('.json'), 'w') as f:
+                json.dump(metadata, f, indent=2)
+            
+            logger.info(f"Saved model to {path}")
+            return
+        
         model_data = {
             'model': self.model,
             'feature_names': self.feature_names,
@@ -229,9 +329,16 @@ class VolumeForecaster(BaseForecaster):
         joblib.dump(model_data, path)
         logger.info(f"Saved model to {path}")
 
-    def load(self, path: "Path") -> "VolumeForecaster":
-        """Load model and thresholds."""
-        from pathlib import Path
+    def load(self, path: Path) -> "VolumeForecaster":
+        """
+        Load model and thresholds saved with ``save`` (native or pickled).
+        
+        Args:
+            path: Path to load model from
+            
+        Returns:
+            self
+        """
         import joblib
         
         path = Path(path)
@@ -239,6 +346,27 @@ class VolumeForecaster(BaseForecaster):
         if not path.exists():
             raise FileNotFoundError(f"Model not found: {path}")
         
+        if path.suffix == '.ubj':
+            with open(path.with_suffix('.json')) as f:
+                metadata = json.load(f)
+            
+            booster = xgb.Booster()
+            booster.load_model(path)
+            # Predict where this machine can, whatever device trained it
+            booster.set_param({'device': resolve_device()})
+            
+            self.model = BoosterRegressor(booster, metadata['feature_names'])
+            self.feature_names = metadata['feature_names']
+            self.model_name = metadata['model_name']
+            self.horizon = metadata['horizon']
+            self.q20_threshold = metadata['q20_threshold']
+            self.q80_threshold = metadata['q80_threshold']
+            self.xgb_params = metadata['xgb_params']
+            self.is_fitted = metadata['is_fitted']
+            
+            logger.info(f"Loaded model from {path}")
+            return self
+        
         model_data = joblib.load(path)
         
         # Handle both base class save format and new format
@@ -266,6 +394,7 @@ class MultiHorizonVolumeForecaster:
     def __init__(
         self,
         horizons: List[int] = [1, 2, 3, 4, 5],
+        n_workers: Optional[int] = 1,
         **xgb_params
     ):
         """
@@ -273,9 +402,14 @@ class MultiHorizonVolumeForecaster:
         
         Args:
             horizons: List of forecast horizons
+            n_workers: Processes training horizons in parallel (default 1:
+                sequentially in-process, sharing one set of histogram
+                cuts; None: one per horizon, up to ``n_jobs`` or the CPU
+                count)
             **xgb_params: XGBoost parameters
         """
         self.horizons = horizons
+        self.n_workers = n_workers
         self.xgb_params = xgb_params
         self.models = {}  # horizon -> VolumeForecaster
     
@@ -284,6 +418,8 @@ class MultiHorizonVolumeForecaster:
         df: pd.DataFrame,
         feature_columns: List[str],
         volume_column: str = 'volume',
+        X: Optional[np.ndarray] = None,
+        ref: Optional[xgb.DMatrix] = None,
         **fit_kwargs
     ) -> 'MultiHorizonVolumeForecaster':
         """
@@ -293,6 +429,11 @@ class MultiHorizonVolumeForecaster:
             df: DataFrame with features and volume
             feature_columns: List of feature column names
             volume_column: Volume column name
+            X: ``df[feature_columns]`` already materialized as a
+                C-contiguous float32 array, e.g. shared with the price
+                forecaster (built from df if omitted)
+            ref: Histogram cuts of X to reuse on the sequential path
+                (sketched once per fit if omitted)
             **fit_kwargs: Additional fit arguments
             
         Returns:
@@ -303,9 +444,63 @@ class MultiHorizonVolumeForecaster:
         logger.info(f"Horizons: {self.horizons}")
         logger.info("=" * 60)
         
-        X = df[feature_columns]
+        # Materialize once; every horizon trains on rows of the same
+        # C-contiguous float32 array instead of re-converting a DataFrame
+        if X is None:
+            X = np.ascontiguousarray(as_float32(df[feature_columns]).to_numpy())
         volume_data = df[volume_column]
         
+        # All horizons' targets from one log transform and one grouper
+        log_volume = np.log1p(volume_data)
+        grouped = log_volume.groupby(df['symbol'], sort=False, observed=True)
+        targets = {
+            horizon: VolumeForecaster(horizon=horizon).create_target(df, volume_column, grouped)
+            for horizon in self.horizons
+        }
+        
+        n_cpus = cpu_budget(self.xgb_params)
+        n_workers = min(self.n_workers or n_cpus, len(self.horizons))
+        
+        # Worker processes would only contend for the same GPU
+        if resolve_device(self.xgb_params.get('device', 'auto')) != 'cpu':
+            n_workers = 1
+        
+        if n_workers > 1:
+            # Workers map the shared copy; drop this call's reference so a
+            # matrix built here is not held twice
+            shm, spec = share_array(X)
+            del X
+            self.models.update(fit_horizons_in_pool(
+                VolumeForecaster,
+                {},
+                self.xgb_params,
+                shm,
+                spec,
+                feature_columns,
+                {horizon: y.to_numpy() for horizon, y in targets.items()},
+                n_workers,
+                fit_args=(volume_data.to_numpy(),),
+                fit_kwargs=fit_kwargs
+            ))
+        else:
+            self._fit_sequential(X, feature_columns, volume_data, targets, ref, fit_kwargs)
+        
+        logger.info("\n" + "=" * 60)
+        logger.info("✓ Multi-Horizon Volume Training Complete!")
+        logger.info("=" * 60)
+        
+        return self
+    
+    def _fit_sequential(
+        self,
+        X: np.ndarray,
+        feature_columns: List[str],
+        volume_data: pd.Series,
+        targets: Dict[int, pd.Series],
+        ref: Optional[xgb.DMatrix],
+        fit_kwargs: Dict
+    ) -> None:
+        """Fit horizons one after another, sharing histogram cuts."""
         for horizon in self.horizons:
             logger.info(f"\nTraining horizon {horizon}...")
             
@@ -315,19 +510,17 @@ class MultiHorizonVolumeForecaster:
                 **self.xgb_params
             )
             
-            # Create target
-            y = forecaster.create_target(df, volume_column)
+            # Target (log volume `horizon` days ahead)
+            y = targets[horizon]
+            
+            # Features are identical across horizons: sketch the cuts once
+            if ref is None:
+                ref = forecaster.build_reference(X, feature_columns)
             
             # Fit
-            forecaster.fit(X, y, volume_data, **fit_kwargs)
+            forecaster.fit(X, y, volume_data, ref=ref, feature_names=feature_columns, **fit_kwargs)
             
             self.models[horizon] = forecaster
-        
-        logger.info("\n" + "=" * 60)
-        logger.info("✓ Multi-Horizon Volume Training Complete!")
-        logger.info("=" * 60)
-        
-        return self
     
     def predict(
         self,
@@ -391,17 +584,23 @@ class MultiHorizonVolumeForecaster:
         """
         Save all horizon models.
         
+        The files are independent, so they are written from a thread pool
+        (XGBoost releases the GIL while serializing).
+        
         Args:
             output_dir: Output directory
         """
-        from pathlib import Path
-        
         output_dir = Path(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
         
-        for horizon, model in self.models.items():
-            model_path = output_dir / f"volume_h{horizon}.pkl"
-            model.save(model_path)
+        with ThreadPoolExecutor(max_workers=max(1, len(self.models))) as executor:
+            futures = [
+                executor.submit(model.save, output_dir / f"volume_h{horizon}.ubj")
+                for horizon, model in self.models.items()
+            ]
+            # Re-raise the first failed write
+            for future in futures:
+                future.result()
         
         logger.info(f"Saved {len(self.models)} volume models to {output_dir}")
     
@@ -409,18 +608,21 @@ class MultiHorizonVolumeForecaster:
         """
         Load all horizon models.
         
+        Native ``.ubj`` models are preferred; pickled ``.pkl`` models from
+        earlier versions are loaded when no native model exists.
+        
         Args:
             input_dir: Input directory
             
         Returns:
             self
         """
-        from pathlib import Path
-        
         input_dir = Path(input_dir)
         
         for horizon in self.horizons:
-            model_path = input_dir / f"volume_h{horizon}.pkl"
+            model_path = input_dir / f"volume_h{horizon}.ubj"
+            if not model_path.exists():
+                model_path = model_path.with_suffix('.pkl')
             
             if not model_path.exists():
                 logger.warning(f"Model not found: {model_path}")
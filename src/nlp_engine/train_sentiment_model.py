@@ -1,21 +1,47 @@
 import pandas as pd
+import re
 import torch
 import logging
 import os
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, Trainer, TrainingArguments, DataCollatorWithPadding
+from transformers import AutoModelForSequenceClassification, Trainer, TrainingArguments, DataCollatorWithPadding
 from datasets import Dataset
 from typing import Dict, List, Optional
-from sentiment_analyzer import FinancialSentimentEngine
+from sentiment_analyzer import FinancialSentimentEngine, _get_tokenizer
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# TF32 matmuls on Ampere+ GPUs (no effect elsewhere)
+torch.backends.cuda.matmul.allow_tf32 = True
+torch.backends.cudnn.allow_tf32 = True
+
+
+def _clean_batch(batch):
+    """
+    Clean a batch of texts with the engine's preprocess (Dataset.map worker).
+    """
+    return {"text": [FinancialSentimentEngine.preprocess(text) for text in batch["text"]]}
+
+
+def _tokenize_batch(examples, tokenizer):
+    """
+    Tokenize a batch of texts (Dataset.map worker; takes only the tokenizer
+    so the model is never pickled to worker processes).
+    No padding here: DataCollatorWithPadding pads each training batch to
+    its own longest example instead of every example to 512 tokens.
+    """
+    return tokenizer(examples["text"], truncation=True, max_length=512)
+
+
 class SentimentTrainer:
-    def __init__(self, model_name: str = "cardiffnlp/twitter-xlm-roberta-base-sentiment", output_dir: str = "models/bvmt_sentiment_model"):
+    def __init__(self, model_name: str = "cardiffnlp/twitter-xlm-roberta-base-sentiment", output_dir: str = "models/bvmt_sentiment_model", num_proc: Optional[int] = None):
         self.model_name = model_name
         self.output_dir = output_dir
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        # Worker processes for Dataset.map (default: all CPUs)
+        self.num_proc = num_proc or os.cpu_count() or 1
+        # Same cached tokenizer as the inference engine
+        self.tokenizer = _get_tokenizer(model_name)
         self.model = AutoModelForSequenceClassification.from_pretrained(model_name, num_labels=3)
         # Use the engine's list of entities and terms for filtering
         self.financial_terms = FinancialSentimentEngine.CRITICAL_FINANCIAL_TERMS
@@ -42,33 +68,18 @@ class SentimentTrainer:
         
         logger.info(f"Initial dataset size: {len(df)}")
         
-        # Simple keyword check for now
-        relevant_keywords = list(self.financial_terms) + list(self.entities.keys())
-        
-        def is_relevant(text):
-            text_lower = str(text).lower()
-            return any(term in text_lower for term in relevant_keywords)
+        # One case-insensitive scan: financial terms as plain substrings (the
+        # lowercase containment check), entities only through the engine's
+        # word-bounded patterns, so "bt" does not match "obtenu" or "debt"
+        relevant_pattern = re.compile(
+            "|".join(map(re.escape, self.financial_terms)) + "|" + FinancialSentimentEngine._ENTITY_RE.pattern,
+            re.IGNORECASE
+        )
 
         # Apply filtering
-        df = df[df['text'].apply(is_relevant)]
+        df = df[df['text'].astype(str).map(lambda text: relevant_pattern.search(text) is not None)]
         logger.info(f"Dataset size after relevance filtering: {len(df)}")
 
-        # 2. Cleaning: Use the engine's preprocess method (static or instantiated)
-        # Since preprocess is an instance method and doesn't rely on self state much (just regex), 
-        # we can instantiate a temporary engine or copy the logic. 
-        # Better: Instantiate engine to reuse logic.
-        engine = FinancialSentimentEngine(model_name=self.model_name) 
-        
-        df['text'] = df['text'].apply(engine.preprocess)
-        
-        # Drop empty strings
-        df = df[df['text'].str.strip() != ""]
-        logger.info(f"Dataset size after cleaning: {len(df)}")
-        
-        if df.empty:
-            raise ValueError("No valid data remaining after filtering and cleaning.")
-
-        # Convert to HF Dataset
         # Map labels if they are strings (Bearish, Neutral, Bullish) -> 0, 1, 2
         # Assuming label col is already 0, 1, 2 or needs mapping.
         # Let's inspect first element type if possible, or force mapping if strings.
@@ -78,16 +89,45 @@ class SentimentTrainer:
              df = df.dropna(subset=['label']) # Drop unknown labels
              df['label'] = df['label'].astype(int)
 
-        dataset = Dataset.from_pandas(df)
+        # Convert to HF Dataset
+        dataset = Dataset.from_pandas(df, preserve_index=False)
+
+        # 2. Cleaning: Use the engine's preprocess method (static, so no
+        # second copy of the model is loaded just to clean text), in batched
+        # worker processes
+        dataset = dataset.map(_clean_batch, batched=True, num_proc=self._map_num_proc(len(dataset)))
+        
+        # Drop empty strings
+        dataset = dataset.filter(lambda batch: [text.strip() != "" for text in batch["text"]], batched=True)
+        logger.info(f"Dataset size after cleaning: {len(dataset)}")
+        
+        if len(dataset) == 0:
+            raise ValueError("No valid data remaining after filtering and cleaning.")
+
         return dataset
 
+    def _map_num_proc(self, n_rows: int) -> Optional[int]:
+        """
+        Worker processes for a Dataset.map over n_rows rows: at most one per
+        1000 rows, so small datasets are not split across idle processes.
+        None (in-process) when a single worker is enough.
+        """
+        num_proc = min(self.num_proc, n_rows // 1000)
+        return num_proc if num_proc > 1 else None
+
     def tokenize_function(self, examples):
-        return self.tokenizer(examples["text"], padding="max_length", truncation=True, max_length=512)
+        return _tokenize_batch(examples, self.tokenizer)
 
     def train(self, data_path: str, epochs: int = 3, batch_size: int = 8, smoke_test: bool = False):
         dataset = self.load_and_preprocess_data(data_path)
         
-        tokenized_datasets = dataset.map(self.tokenize_function, batched=True)
+        tokenized_datasets = dataset.map(
+            _tokenize_batch,
+            batched=True,
+            batch_size=1000,
+            num_proc=self._map_num_proc(len(dataset)),
+            fn_kwargs={"tokenizer": self.tokenizer}
+        )
         
         # Split
         if len(tokenized_datasets) > 10:
@@ -99,6 +139,10 @@ class SentimentTrainer:
             train_dataset = tokenized_datasets
             eval_dataset = tokenized_datasets
 
+        # Mixed precision and torch.compile only pay off on GPU
+        use_gpu = torch.cuda.is_available()
+        bf16 = use_gpu and torch.cuda.is_bf16_supported()
+
         training_args = TrainingArguments(
             output_dir=self.output_dir,
             num_train_epochs=epochs if not smoke_test else 1,
@@ -111,7 +155,11 @@ class SentimentTrainer:
             load_best_model_at_end=True if len(dataset) > 10 else False,
             logging_dir=f"{self.output_dir}/logs",
             logging_steps=10,
-            use_cpu=not torch.cuda.is_available(),
+            use_cpu=not use_gpu,
+            bf16=bf16,
+            fp16=use_gpu and not bf16,
+            torch_compile=use_gpu and not smoke_test, # Compile time would dominate a 2-step smoke test
+            group_by_length=True, # Batch similar lengths together so dynamic padding stays short
             save_steps=500 if not smoke_test else 10 # frequent saves for test? No, save_strategy epoch handles it.
         )
         
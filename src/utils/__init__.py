@@ -11,6 +11,7 @@ from src.utils.exceptions import (
     ConfigurationError
 )
 from src.utils.calendar import TunisianTradingCalendar
+from src.utils.parallel import share_array, attach_array
 
 __all__ = [
     'logger',
@@ -23,5 +24,7 @@ __all__ = [
     'ModelError',
     'PredictionError',
     'ConfigurationError',
-    'TunisianTradingCalendar'
+    'TunisianTradingCalendar',
+    'share_array',
+    'attach_array'
 ]
@@ -1,16 +1,48 @@
 """Tunisia-specific trading calendar and holidays."""
 
 import pandas as pd
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 import hijri_converter
 from typing import List, Optional
 
+
+@lru_cache(maxsize=64)
+def _ramadan_windows(year: int) -> tuple:
+    """(start, end) of each Ramadan falling in a Gregorian year, clipped to it."""
+    first_day = date(year, 1, 1)
+    last_day = date(year, 12, 31)
+    hijri_first = hijri_converter.convert.Gregorian(year, 1, 1).to_hijri().year
+    hijri_last = hijri_converter.convert.Gregorian(year, 12, 31).to_hijri().year
+    
+    # A Gregorian year spans at most two Hijri years (and so can hold two
+    # Ramadans), so converting each 1 Ramadan back replaces a day-by-day scan
+    windows = []
+    for hijri_year in range(hijri_first, hijri_last + 1):
+        month = hijri_converter.convert.Hijri(hijri_year, 9, 1)
+        start = date(*month.to_gregorian().datetuple())
+        end = start + timedelta(days=month.month_length() - 1)
+        if end < first_day or start > last_day:
+            continue
+        windows.append((max(start, first_day), min(end, last_day)))
+        
+    return tuple(windows)
+
+
+def _ramadan_dates(year: int) -> tuple:
+    """First and last Ramadan day falling in a Gregorian year."""
+    windows = _ramadan_windows(year)
+    if not windows:
+        return None, None
+    return windows[0][0], windows[-1][1]
+
+
 class TunisianTradingCalendar:
     """Calendar for BVMT trading days and holidays."""
     
     def __init__(self):
-        # Fixed holidays (Month, Day)
-        self.fixed_holidays = [
+        # Fixed holidays (Month, Day), a set for constant-time lookups
+        self.fixed_holidays = frozenset([
             (1, 1),   # New Year's Day
             (1, 14),  # Revolution and Youth Day
             (3, 20),  # Independence Day
@@ -19,7 +51,7 @@ class TunisianTradingCalendar:
             (7, 25),  # Republic Day
             (8, 13),  # Women's Day
             (10, 15), # Evacuation Day
-        ]
+        ])
     
     def is_trading_day(self, dt: datetime) -> bool:
         """Check if date is a trading day."""
@@ -43,9 +75,9 @@ class TunisianTradingCalendar:
         start = "09:00"
         end = "14:10"
         
-        # Check if Ramadan
-        hijri = hijri_converter.convert.Gregorian(dt.year, dt.month, dt.day).to_hijri()
-        if hijri.month == 9:  # Ramadan
+        # Check if Ramadan, against the year's cached Ramadan windows
+        day = date(dt.year, dt.month, dt.day)
+        if any(start <= day <= end for start, end in _ramadan_windows(dt.year)):
             start = "10:00"
             end = "12:30"
             
@@ -55,16 +87,4 @@ class TunisianTradingCalendar:
         """Get start and end dates of Ramadan for a Gregorian year."""
         # This is an approximation as lunar visibility varies
         # Using hijri-converter to find the range
-        start_date = None
-        end_date = None
-        
-        d = date(year, 1, 1)
-        while d.year == year:
-            h = hijri_converter.convert.Gregorian(d.year, d.month, d.day).to_hijri()
-            if h.month == 9:
-                if start_date is None:
-                    start_date = d
-                end_date = d
-            d += pd.Timedelta(days=1)
-            
-        return start_date, end_date
+        return _ramadan_dates(year)
@@ -10,6 +10,7 @@ class Config:
     
     _instance = None
     _config: Dict[str, Any] = {}
+    _flat: Dict[str, Any] = {}
     
     def __new__(cls):
         if cls._instance is None:
@@ -26,6 +27,27 @@ class Config:
         
         with open(config_path, 'r', encoding='utf-8') as f:
             self._config = yaml.safe_load(f)
+        
+        # Every dotted path, nested sections included, resolved once
+        self._flat = {}
+        self._flatten(self._config, "")
+    
+    def _flatten(self, node: Any, prefix: str) -> None:
+        """
+        Record every dotted key below node in the flat lookup table.
+        
+        Args:
+            node: Nested configuration section
+            prefix: Dotted path of node, with trailing dot
+        """
+        if not isinstance(node, dict):
+            return
+        
+        for k, value in node.items():
+            if not isinstance(k, str):
+                continue
+            self._flat[prefix + k] = value
+            self._flatten(value, prefix + k + ".")
     
     def get(self, key: str, default: Any = None) -> Any:
         """
@@ -38,18 +60,8 @@ class Config:
         Returns:
             Configuration value
         """
-        keys = key.split('.')
-        value = self._config
-        
-        for k in keys:
-            if isinstance(value, dict):
-                value = value.get(k)
-                if value is None:
-                    return default
-            else:
-                return default
-        
-        return value
+        value = self._flat.get(key)
+        return default if value is None else value
     
     def __getitem__(self, key: str) -> Any:
         """Allow dictionary-style access."""
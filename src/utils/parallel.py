@@ -0,0 +1,47 @@
+"""Helpers for sharing NumPy arrays with worker processes."""
+
+from multiprocessing import shared_memory
+from typing import Tuple
+
+import numpy as np
+
+
+ArraySpec = Tuple[str, Tuple[int, ...], str]
+
+
+def share_array(array: np.ndarray) -> Tuple[shared_memory.SharedMemory, ArraySpec]:
+    """
+    Copy an array into a new shared memory block.
+    
+    The caller owns the block and must ``close()`` and ``unlink()`` it
+    once the workers are done.
+    
+    Args:
+        array: Array to share
+        
+    Returns:
+        Tuple of (shared memory block, spec to pass to ``attach_array``)
+    """
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    shared = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+    shared[...] = array
+    
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def attach_array(spec: ArraySpec) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+    """
+    Map a shared array created by ``share_array`` without copying it.
+    
+    Keep the returned block referenced for as long as the array is used.
+    
+    Args:
+        spec: Spec returned by ``share_array``
+        
+    Returns:
+        Tuple of (shared memory block, array view onto it)
+    """
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
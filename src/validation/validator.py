@@ -13,6 +13,9 @@ from src.utils import logger
 class WalkForwardValidator:
     """Walk-forward validation for time-series models."""
     
+    # Per-horizon arrays returned by validate_model()
+    RESULT_KEYS = ('y_true', 'y_pred', 'lower_bound', 'upper_bound')
+    
     def __init__(
         self,
         initial_train_size: int = 1260,
@@ -34,36 +37,93 @@ class WalkForwardValidator:
     def create_splits(
         self,
         df: pd.DataFrame,
-        date_column: str = 'date'
+        date_column: str = 'date',
+        sort: bool = True
     ) -> List[Tuple[pd.DataFrame, pd.DataFrame]]:
         """
         Create walk-forward train/test splits.
         
+        Splits are row slices of df, not copies; treat them as read-only.
+        
         Args:
             df: DataFrame with time-series data
             date_column: Name of date column
+            sort: Sort df by date first (False if the caller already did)
             
         Returns:
             List of (train_df, test_df) tuples
         """
-        # Sort by date
-        df = df.sort_values(date_column).reset_index(drop=True)
+        # Sort by date (stable, so rows of one date keep their order)
+        if sort:
+            df = df.sort_values(date_column, kind='mergesort', ignore_index=True)
+        
+        num_splits = 0
+        for train_end, test_end in self._split_bounds(len(df)):
+            # Create split
+            yield df.iloc[:train_end], df.iloc[train_end:test_end]
+            num_splits += 1
+        
+        logger.info(f"Processed {num_splits} walk-forward splits")
+    
+    def iter_splits_np(
+        self,
+        df: pd.DataFrame,
+        feature_columns: List[str],
+        horizons: List[int] = [1, 2, 3, 4, 5],
+        date_column: str = 'date'
+    ):
+        """
+        Create walk-forward splits as NumPy windows instead of DataFrames.
+        
+        Same row windows as create_splits(), sliced from one float32 feature
+        matrix built up front, so no pandas indexing happens per split.
+        Targets are the per-symbol log_return shifts used by validate_model().
+        
+        Args:
+            df: DataFrame with features, symbol and log_return
+            feature_columns: List of feature columns
+            horizons: Forecast horizons to build targets for
+            date_column: Name of date column
+            
+        Yields:
+            (X_train, X_test, y_train, y_test) with y_* mapping horizon -> targets
+        """
+        df = self._add_targets(df.sort_values(date_column, kind='mergesort', ignore_index=True), horizons)
+        
+        X = np.ascontiguousarray(df[feature_columns].to_numpy(dtype=np.float32))
+        targets = {
+            horizon: df[self._target_column(horizon)].to_numpy(dtype=np.float32)
+            for horizon in horizons
+        }
+        
+        for train_end, test_end in self._split_bounds(len(df)):
+            yield (
+                X[:train_end],
+                X[train_end:test_end],
+                {horizon: y[:train_end] for horizon, y in targets.items()},
+                {horizon: y[train_end:test_end] for horizon, y in targets.items()}
+            )
+    
+    def _split_bounds(self, n_rows: int):
+        """
+        Row bounds of each walk-forward split.
         
+        Args:
+            n_rows: Number of rows in the date-sorted data
+            
+        Yields:
+            (train_end, test_end): train rows [0, train_end), test rows [train_end, test_end)
+        """
         # Start from initial training size
         train_end = self.initial_train_size
         
         num_splits = 0
-        while train_end < len(df):
+        while train_end < n_rows:
             # Define test end
-            test_end = min(train_end + self.step_size, len(df))
-            
-            # Create split
-            train_df = df.iloc[:train_end].copy()
-            test_df = df.iloc[train_end:test_end].copy()
+            test_end = min(train_end + self.step_size, n_rows)
             
-            if len(test_df) > 0:
-                yield train_df, test_df
-                num_splits += 1
+            yield train_end, test_end
+            num_splits += 1
             
             # Move forward
             train_end = test_end
@@ -71,8 +131,6 @@ class WalkForwardValidator:
             # Stop if we've reached max test size
             if self.max_test_size and num_splits >= self.max_test_size:
                 break
-        
-        logger.info(f"Processed {num_splits} walk-forward splits")
     
     def validate_model(
         self,
@@ -97,24 +155,27 @@ class WalkForwardValidator:
         """
         logger.info("Starting walk-forward validation...")
         
-        # Create splits
-        splits = self.create_splits(df)
+        # Horizon targets, shifted once per symbol over the whole history (the
+        # same targets the model trains on) instead of per split inside the loop
+        df = self._add_targets(df.sort_values('date', kind='mergesort', ignore_index=True), horizons)
         
-        # Store predictions and actuals
-        results = {
-            horizon: {
-                'y_true': [],
-                'y_pred': [],
-                'lower_bound': [],
-                'upper_bound': []
-            }
-            for horizon in horizons
-        }
+        # Create splits (df is already in date order)
+        splits = self.create_splits(df, sort=False)
         
         # Calculate total splits for progress bar
         total_splits = (len(df) - self.initial_train_size) // self.step_size
         if self.max_test_size:
             total_splits = min(total_splits, self.max_test_size)
+        
+        # Store predictions and actuals in buffers sized for every test row,
+        # filled split by split and trimmed at the end
+        capacity = max(len(df) - self.initial_train_size, 0)
+        if self.max_test_size:
+            capacity = min(capacity, self.max_test_size * self.step_size)
+        # One (key, row) block per horizon, so each key's values are a
+        # contiguous row of a single allocation
+        buffers = {horizon: np.empty((len(self.RESULT_KEYS), capacity)) for horizon in horizons}
+        filled = {horizon: dict.fromkeys(self.RESULT_KEYS, 0) for horizon in horizons}
             
         # Iterate through splits
         for i, (train_df, test_df) in enumerate(tqdm(splits, total=total_splits, desc="Validating")):
@@ -134,27 +195,60 @@ class WalkForwardValidator:
             
             # Store results
             for horizon in horizons:
-                # Get actual values (shifted by horizon)
-                y_true = test_df.groupby('symbol')['log_return'].shift(-horizon)
+                # Actual values (shifted by horizon); rows without one are
+                # dropped from the predictions too, keeping the arrays aligned
+                y_true = test_df[self._target_column(horizon)].to_numpy()
+                valid = ~np.isnan(y_true)
                 
                 # Store predictions and actuals
-                results[horizon]['y_true'].extend(y_true.dropna().values)
-                results[horizon]['y_pred'].extend(predictions[horizon][0.5])  # Median
-                
+                columns = {
+                    'y_true': y_true,
+                    'y_pred': predictions[horizon][0.5]  # Median
+                }
                 if horizon in intervals and confidence_level in intervals[horizon]:
-                    lower, upper = intervals[horizon][confidence_level]
-                    results[horizon]['lower_bound'].extend(lower)
-                    results[horizon]['upper_bound'].extend(upper)
+                    columns['lower_bound'], columns['upper_bound'] = intervals[horizon][confidence_level]
+                
+                for key, values in columns.items():
+                    values = np.asarray(values)[valid]
+                    start = filled[horizon][key]
+                    buffers[horizon][self.RESULT_KEYS.index(key), start:start + len(values)] = values
+                    filled[horizon][key] = start + len(values)
         
-        # Convert lists to arrays
-        for horizon in horizons:
-            for key in results[horizon]:
-                results[horizon][key] = np.array(results[horizon][key])
+        # Expose each key as a view of its row, trimmed to the values written
+        results = {
+            horizon: {
+                key: buffers[horizon][row, :filled[horizon][key]]
+                for row, key in enumerate(self.RESULT_KEYS)
+            }
+            for horizon in horizons
+        }
         
         logger.info("✓ Walk-forward validation complete")
         
         return results
     
+    @staticmethod
+    def _target_column(horizon: int) -> str:
+        """Name of the precomputed target column for a horizon."""
+        return f'_y_h{horizon}'
+    
+    def _add_targets(self, df: pd.DataFrame, horizons: List[int]) -> pd.DataFrame:
+        """
+        Add each horizon's target: log_return shifted back per symbol.
+        
+        Args:
+            df: Date-sorted DataFrame with symbol and log_return
+            horizons: Forecast horizons
+            
+        Returns:
+            DataFrame with one target column per horizon
+        """
+        grouped = df.groupby('symbol', sort=False, observed=True)['log_return']
+        return df.assign(**{
+            self._target_column(horizon): grouped.shift(-horizon)
+            for horizon in horizons
+        })
+    
     def evaluate_results(
         self,
         results: Dict[int, Dict[str, np.ndarray]],
@@ -256,17 +350,54 @@ class Backtester:
         df['strategy_return'] = df['signal'] * df['log_return_actual']
         
         # Apply transaction costs
-        df['position_change'] = df.groupby('symbol')['signal'].diff().abs()
+        df['position_change'] = self._position_changes(df['symbol'], df['signal'])
         df['transaction_cost'] = df['position_change'] * self.transaction_cost
         df['net_return'] = df['strategy_return'] - df['transaction_cost']
         
-        # Calculate cumulative returns
-        df['cumulative_return'] = (1 + df['net_return']).cumprod()
+        # Calculate cumulative returns: NumPy running product on the raw array;
+        # rows without a return stay NaN and are skipped, as Series.cumprod does
+        growth = 1 + df['net_return'].to_numpy(dtype=np.float64)
+        cumulative = np.nancumprod(growth)
+        cumulative[np.isnan(growth)] = np.nan
+        df['cumulative_return'] = cumulative
         
         logger.info("✓ Backtest complete")
         
         return df
     
+    @staticmethod
+    def _position_changes(symbols: pd.Series, signals: pd.Series) -> np.ndarray:
+        """
+        Absolute signal change from the previous row of the same symbol.
+        
+        Same result as ``groupby(symbol)[signal].diff().abs()`` (NaN on each
+        symbol's first row), computed with one stable sort and one diff
+        instead of a groupby.
+        
+        Args:
+            symbols: Symbol per row
+            signals: Trading signal per row
+            
+        Returns:
+            Position changes in the original row order
+        """
+        codes = pd.factorize(symbols)[0]
+        order = np.argsort(codes, kind='stable')
+        codes = codes[order]
+        values = signals.to_numpy(dtype=np.float64)[order]
+        
+        changes = np.full(len(values), np.nan)
+        if len(values) > 1:
+            np.abs(np.subtract(values[1:], values[:-1], out=changes[1:]), out=changes[1:])
+            # No previous row at a symbol boundary (or for a missing symbol)
+            changes[1:][codes[1:] != codes[:-1]] = np.nan
+        changes[codes < 0] = np.nan
+        
+        result = np.empty_like(changes)
+        result[order] = changes
+        
+        return result
+    
     def calculate_performance_metrics(
         self,
         backtest_df: pd.DataFrame
@@ -0,0 +1,260 @@
+"""Unit tests for feature engineering."""
+
+import bottleneck as bn
+import pandas as pd
+import numpy as np
+import pytest
+
+from src.features import (
+    FeaturePipeline,
+    calculate_all_market_features,
+    calculate_all_price_features,
+    calculate_all_volume_features
+)
+from src.features.kernels import (
+    OnlineEMA,
+    compute_multi_sma,
+    get_group_codes,
+    grouped_ema,
+    grouped_moving,
+    grouped_rolling_mean,
+    grouped_shift
+)
+from src.features.pandas_options import with_feature_options
+from src.features.price_features import calculate_returns
+
+
+def make_stock_df(symbols=('ABC', 'XYZ'), periods=80, seed=0):
+    """Build an interleaved multi-symbol OHLCV frame."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start='2023-01-01', periods=periods, freq='B')
+    frames = []
+    for symbol in symbols:
+        close = rng.standard_normal(periods).cumsum() + 100
+        frames.append(pd.DataFrame({
+            'date': dates,
+            'symbol': symbol,
+            'open': close + rng.standard_normal(periods) * 0.1,
+            'high': close + 1.0,
+            'low': close - 1.0,
+            'close': close,
+            'adj_close': close,
+            'volume': rng.integers(1000, 10000, periods),
+            'num_trades': rng.integers(10, 100, periods),
+            'turnover': rng.uniform(10000, 100000, periods)
+        }))
+    
+    # Interleave symbols by date to exercise the sorting paths
+    return pd.concat(frames).sort_values(['date', 'symbol']).reset_index(drop=True)
+
+
+def test_drop_insufficient_history():
+    """First N rows of every symbol are dropped."""
+    df = make_stock_df(symbols=('XYZ', 'ABC', 'MNO'), periods=30)
+    
+    pipeline = FeaturePipeline()
+    result = pipeline.drop_insufficient_history(df, lookback_window=10)
+    
+    assert len(result) == 3 * 20
+    assert (result.groupby('symbol')['date'].min() == df['date'].sort_values().unique()[10]).all()
+
+
+def test_load_processed_data_enforces_numeric(tmp_path):
+    """Numeric columns stored as text are coerced once at load."""
+    df = make_stock_df(periods=10)
+    df['close'] = df['close'].astype(str)
+    df.loc[0, 'close'] = 'n/a'
+    df.to_parquet(tmp_path / 'stock_data.parquet')
+    pd.DataFrame({'date': df['date'].unique(), 'value': '100.5'}).to_parquet(tmp_path / 'tunindex_data.parquet')
+    
+    pipeline = FeaturePipeline()
+    pipeline.processed_dir = tmp_path
+    stock_df, index_df = pipeline.load_processed_data()
+    
+    assert np.issubdtype(stock_df['close'].dtype, np.floating)
+    assert np.isnan(stock_df.loc[0, 'close'])
+    assert np.issubdtype(index_df['value'].dtype, np.floating)
+
+
+def test_feature_stages_leave_input_untouched():
+    """Helpers mutate in place, but the calculate_all_* entry points do not."""
+    df = make_stock_df(periods=30)
+    original = df.copy()
+    
+    calculate_all_price_features(df)
+    calculate_all_volume_features(df)
+    
+    pd.testing.assert_frame_equal(df, original)
+
+
+def test_feature_options_are_scoped_to_entry_points():
+    """Copy-on-write is on inside the entry points only, not after importing src.features."""
+    seen = []
+    
+    @with_feature_options
+    def probe():
+        seen.append(pd.get_option('mode.copy_on_write'))
+    
+    before = pd.get_option('mode.copy_on_write')
+    probe()
+    calculate_all_price_features(make_stock_df(periods=30))
+    
+    assert seen == [True]
+    assert pd.get_option('mode.copy_on_write') == before
+
+
+def test_simple_return_bridges_missing_prices():
+    """Simple returns pad over a missing price; log returns stay 0 next to it."""
+    df = pd.DataFrame({
+        'symbol': ['A'] * 4,
+        'adj_close': [100.0, np.nan, 110.0, 121.0]
+    })
+    
+    result = calculate_returns(df)
+    
+    np.testing.assert_allclose(result['simple_return'], [0.0, 0.0, 0.1, 0.1])
+    np.testing.assert_allclose(result['log_return'], [0.0, 0.0, 0.0, np.log(1.1)])
+
+
+def test_grouped_ema_matches_pandas():
+    """Grouped EMA kernel reproduces pandas ewm(adjust=False), gaps included."""
+    df = make_stock_df(symbols=('XYZ', 'ABC', 'MNO'), periods=50)
+    df.loc[[3, 17, 18, 40], 'adj_close'] = np.nan
+    
+    codes, n_groups = get_group_codes(df['symbol'])
+    result = grouped_ema(df['adj_close'].to_numpy(), codes, n_groups, [5, 12])
+    
+    for span, ema in zip([5, 12], result):
+        expected = df.groupby('symbol')['adj_close'].transform(
+            lambda x: x.ewm(span=span, adjust=False).mean()
+        )
+        np.testing.assert_allclose(ema, expected.to_numpy(), rtol=1e-12)
+
+
+def test_grouped_moving_matches_pandas_rolling():
+    """Bottleneck windows never span two symbols."""
+    df = make_stock_df(symbols=('XYZ', 'ABC', 'MNO'), periods=30)
+    
+    codes, _ = get_group_codes(df['symbol'])
+    result = grouped_moving(df['adj_close'].to_numpy(), codes, 5, bn.move_std, ddof=1)
+    
+    expected = df.groupby('symbol')['adj_close'].transform(
+        lambda x: x.rolling(window=5, min_periods=5).std()
+    )
+    np.testing.assert_allclose(result, expected.to_numpy(), rtol=1e-9)
+
+
+def test_grouped_rolling_mean_pins_flat_windows():
+    """A run of zero volume after large values averages to exactly zero."""
+    df = make_stock_df(symbols=('XYZ', 'ABC'), periods=40)
+    df['volume'] = df['volume'].astype(float)
+    df.loc[df['symbol'] == 'ABC', 'volume'] = [1e8 + 7.3] * 10 + [0.0] * 30
+    
+    codes, _ = get_group_codes(df['symbol'])
+    result = grouped_rolling_mean(df['volume'].to_numpy(dtype=float), codes, 5)
+    
+    expected = df.groupby('symbol')['volume'].transform(
+        lambda x: x.rolling(window=5, min_periods=5).mean()
+    )
+    np.testing.assert_allclose(result, expected.to_numpy(), rtol=1e-9)
+    assert (result[(df['symbol'] == 'ABC').to_numpy()][-20:] == 0).all()
+
+
+def test_multi_window_kernels_match_pandas():
+    """Cumsum SMA and grouped shifts reproduce rolling/shift/pct_change."""
+    df = make_stock_df(symbols=('XYZ', 'ABC', 'MNO'), periods=40)
+    df.loc[[4, 30, 31, 75], 'adj_close'] = np.nan
+    prices = df['adj_close'].to_numpy()
+    grouped = df.groupby('symbol')['adj_close']
+    codes, _ = get_group_codes(df['symbol'])
+    
+    for window, sma in zip([3, 10], compute_multi_sma(prices, codes, [3, 10])):
+        expected = grouped.transform(lambda x: x.rolling(window=window, min_periods=window).mean())
+        np.testing.assert_allclose(sma, expected.to_numpy(), rtol=1e-10)
+    
+    for lag, lagged in zip([1, 5], grouped_shift(prices, codes, [1, 5])):
+        np.testing.assert_array_equal(lagged, grouped.shift(lag).to_numpy())
+    
+    *shifted, filled = grouped_shift(prices, codes, [1, 5], ffill=True)
+    for period, previous in zip([1, 5], shifted):
+        expected = grouped.transform(lambda x: x.ffill().pct_change(periods=period))
+        np.testing.assert_allclose(filled / previous - 1, expected.to_numpy())
+
+
+def test_online_ema_matches_batch():
+    """Streaming EMA updates agree with the batch computation."""
+    prices = make_stock_df(symbols=('ABC',), periods=40)['adj_close']
+    
+    ema = OnlineEMA(span=10)
+    streamed = [ema.update(price) for price in prices]
+    
+    np.testing.assert_allclose(streamed, prices.ewm(span=10, adjust=False).mean().to_numpy())
+
+
+def test_market_return_computed_on_index():
+    """Market return is the index's own daily change, mapped by date."""
+    df = make_stock_df(symbols=('XYZ', 'ABC'), periods=30)
+    dates = df['date'].drop_duplicates().sort_values()
+    index_df = pd.DataFrame({'date': dates, 'value': np.linspace(100, 130, len(dates))})
+    # Index has no print on one trading day
+    index_df = index_df.drop(index_df.index[10])
+    df['log_return'] = 0.0
+    
+    result = calculate_all_market_features(df, index_df, {'market_corr_window': 5})
+    
+    expected = index_df.set_index('date')['value'].pct_change()
+    by_date = result.groupby('date')['market_return'].agg(['min', 'max'])
+    assert by_date['min'].equals(by_date['max'])
+    np.testing.assert_allclose(by_date['min'].reindex(expected.index), expected)
+    assert by_date.loc[dates.iloc[10], 'min'] == 0.0
+    assert len(result) == len(df)
+
+
+def test_reported_market_change_is_not_zero_filled():
+    """Dates without a reported change_pct keep a NaN market return."""
+    df = make_stock_df(symbols=('XYZ', 'ABC'), periods=30)
+    dates = df['date'].drop_duplicates().sort_values()
+    index_df = pd.DataFrame({
+        'date': dates,
+        'value': np.linspace(100, 130, len(dates)),
+        'change_pct': np.full(len(dates), 0.01)
+    })
+    index_df.loc[index_df.index[5], 'change_pct'] = np.nan
+    index_df = index_df.drop(index_df.index[10])
+    df['log_return'] = 0.0
+    
+    result = calculate_all_market_features(df, index_df, {'market_corr_window': 5})
+    
+    missing = result['date'].isin([dates.iloc[5], dates.iloc[10]])
+    assert result.loc[missing, 'market_return'].isna().all()
+    assert (result.loc[~missing, 'market_return'] == 0.01).all()
+
+
+def test_polars_price_features_match_pandas():
+    """Polars engine reproduces the pandas price features."""
+    pl = pytest.importorskip('polars')
+    from src.features.price_features_polars import calculate_all_price_features_pl
+    
+    df = make_stock_df(symbols=('XYZ', 'ABC'), periods=80)
+    # Missing prices, including consecutive ones, inside both symbols' history
+    df.loc[[40, 41, 42, 101, 150], 'adj_close'] = np.nan
+    
+    expected = calculate_all_price_features(df)
+    result = calculate_all_price_features_pl(pl.from_pandas(df).lazy()).collect().to_pandas()
+    
+    assert list(result.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_polars_volume_features_match_pandas():
+    """Polars engine reproduces the pandas volume features."""
+    pl = pytest.importorskip('polars')
+    from src.features.volume_features_polars import calculate_all_volume_features_pl
+    
+    df = make_stock_df(symbols=('XYZ', 'ABC'), periods=80)
+    
+    expected = calculate_all_volume_features(df)
+    result = calculate_all_volume_features_pl(pl.from_pandas(df).lazy()).collect().to_pandas()
+    
+    assert list(result.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
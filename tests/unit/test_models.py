@@ -0,0 +1,137 @@
+"""Unit tests for forecasting models."""
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from src.models import trainer as trainer_module
+from src.models.price_forecaster import MultiHorizonForecaster, XGBQuantileForecaster
+from src.models.volume_forecaster import MultiHorizonVolumeForecaster, VolumeForecaster
+from src.utils import config
+
+
+def make_training_data(n=300, seed=0):
+    """Build a small regression problem with a single informative feature."""
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.standard_normal((n, 4)), columns=['f0', 'f1', 'f2', 'f3'])
+    y = pd.Series(0.1 * X['f0'] + 0.01 * rng.standard_normal(n))
+    return X, y
+
+
+def test_joint_quantile_forecaster_matches_sklearn_regressor():
+    X, y = make_training_data()
+    model = XGBQuantileForecaster(horizon=1, quantiles=[0.1, 0.5, 0.9], n_estimators=20)
+    model.fit(X, y)
+    
+    preds = model.predict(X)
+    assert list(preds) == [0.1, 0.5, 0.9]
+    
+    params = dict(model.xgb_params, quantile_alpha=[0.1, 0.5, 0.9])
+    reference = xgb.XGBRegressor(**params).fit(X.astype(np.float32), y.astype(np.float32))
+    expected = reference.predict(X.astype(np.float32))
+    for i, quantile in enumerate(model.quantiles):
+        np.testing.assert_allclose(preds[quantile], expected[:, i], rtol=1e-5, atol=1e-6)
+        np.testing.assert_array_equal(model.models[quantile].predict(X), preds[quantile])
+    
+    importance = model.get_feature_importance(0.5)
+    assert importance['feature'].iloc[0] == 'f0'
+    assert np.isclose(importance['importance'].sum(), 1.0)
+
+
+def test_native_save_round_trip(tmp_path):
+    X, y = make_training_data()
+    model = XGBQuantileForecaster(horizon=2, quantiles=[0.1, 0.5, 0.9], n_estimators=10)
+    model.fit(X, y)
+    model.save(tmp_path / 'xgb_h2.ubj')
+    
+    loaded = XGBQuantileForecaster().load(tmp_path / 'xgb_h2.ubj')
+    assert loaded.horizon == 2
+    assert loaded.feature_names == model.feature_names
+    
+    expected = model.predict(X)
+    for quantile, preds in loaded.predict(X).items():
+        np.testing.assert_array_equal(preds, expected[quantile])
+
+
+def test_volume_native_save_round_trip(tmp_path):
+    X, y = make_training_data()
+    volume = pd.Series(np.exp(5 + X['f0']))
+    model = VolumeForecaster(horizon=1, n_estimators=10)
+    model.fit(X, np.log1p(volume), volume)
+    model.save(tmp_path / 'volume_h1.ubj')
+    
+    loaded = VolumeForecaster().load(tmp_path / 'volume_h1.ubj')
+    assert loaded.horizon == 1
+    assert loaded.q20_threshold == model.q20_threshold
+    assert loaded.q80_threshold == model.q80_threshold
+    
+    expected_volume, expected_regime = model.predict_liquidity_regime(X)
+    volume_pred, regime = loaded.predict_liquidity_regime(X)
+    np.testing.assert_array_equal(volume_pred, expected_volume)
+    np.testing.assert_array_equal(regime, expected_regime)
+
+
+def test_trainer_passes_yaml_device_to_boosters(monkeypatch, tmp_path):
+    assert 'xgb_device' in config.all['models']
+    monkeypatch.setitem(config.all['models'], 'xgb_device', 'cuda')
+    
+    captured = {}
+    
+    class RecordingForecaster:
+        def __init__(self, **kwargs):
+            captured.update(kwargs)
+        
+        def fit(self, *args, **kwargs):
+            pass
+        
+        def save(self, path):
+            pass
+    
+    monkeypatch.setattr(trainer_module, 'MultiHorizonForecaster', RecordingForecaster)
+    trainer = trainer_module.ModelTrainer()
+    trainer.models_dir = tmp_path
+    trainer.train_price_models(None, None, ['f0'])
+    
+    assert captured['device'] == 'cuda'
+
+
+def test_parallel_training_is_opt_in_from_yaml(monkeypatch):
+    assert trainer_module.ModelTrainer()._can_train_in_parallel() is False
+    
+    monkeypatch.setitem(config.all['models'], 'parallel_train', True)
+    monkeypatch.setitem(config.all['models'], 'xgb_device', 'cpu')
+    monkeypatch.setattr(trainer_module.os, 'cpu_count', lambda: 4)
+    assert trainer_module.ModelTrainer()._can_train_in_parallel() is True
+
+
+def test_default_config_fits_every_horizon_on_the_shared_reference(monkeypatch, tmp_path):
+    seen = []
+    
+    def record_fit(self, X, y, *args, ref=None, **kwargs):
+        seen.append(ref)
+        return self
+    
+    # A multi-core host, where horizons fitted in worker processes would
+    # bypass the recording fit
+    monkeypatch.setattr(trainer_module.os, 'cpu_count', lambda: 8)
+    monkeypatch.setattr(XGBQuantileForecaster, 'fit', record_fit)
+    monkeypatch.setattr(VolumeForecaster, 'fit', record_fit)
+    monkeypatch.setattr(MultiHorizonForecaster, 'save', lambda self, path: None)
+    monkeypatch.setattr(MultiHorizonVolumeForecaster, 'save', lambda self, path: None)
+    
+    X, y = make_training_data()
+    train_df = X.assign(symbol='A', log_return=y, volume=np.exp(5 + X['f0']))
+    feature_columns = list(X.columns)
+    
+    trainer = trainer_module.ModelTrainer()
+    trainer.models_dir = tmp_path
+    assert trainer._fits_horizons_in_process()
+    
+    X_shared, ref = trainer._feature_matrix(train_df, feature_columns)
+    trainer.train_price_models(train_df, None, feature_columns, X=X_shared, ref=ref)
+    trainer.train_volume_models(train_df, None, feature_columns, X=X_shared, ref=ref)
+    
+    n_horizons = len(trainer.price_forecaster.horizons) + len(trainer.volume_forecaster.horizons)
+    assert ref is not None
+    assert len(seen) == n_horizons
+    assert all(used is ref for used in seen)
@@ -0,0 +1,114 @@
+"""Unit tests for validation metrics."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.validation.metrics import (
+    calculate_confidence_interval_coverage,
+    calculate_mae,
+    calculate_max_drawdown,
+    calculate_rmse,
+    calculate_sharpe_ratio,
+    evaluate_multi_horizon
+)
+from src.validation.validator import Backtester, WalkForwardValidator
+
+
+def test_max_drawdown_matches_running_max_formula():
+    rng = np.random.default_rng(0)
+    cumulative = np.cumprod(1 + rng.normal(0, 0.02, 500))
+    
+    running_max = np.maximum.accumulate(cumulative)
+    expected = ((cumulative - running_max) / running_max).min()
+    
+    assert np.isclose(calculate_max_drawdown(cumulative), expected)
+    assert calculate_max_drawdown(np.array([1.0, 1.1, 1.2])) == 0.0
+    assert np.isnan(calculate_max_drawdown(np.array([1.0, np.nan, 0.9])))
+
+
+def test_rmse_and_mae_pair_multi_output_and_column_inputs():
+    rng = np.random.default_rng(0)
+    y_true = rng.normal(size=(50, 2))
+    y_pred = rng.normal(size=(50, 2))
+    errors = y_true - y_pred
+    
+    assert np.isclose(calculate_rmse(y_true, y_pred), np.sqrt(np.mean(errors ** 2)))
+    assert np.isclose(calculate_mae(y_true, y_pred), np.mean(np.abs(errors)))
+    
+    # (n,) against (n, 1) pairs element-wise instead of broadcasting
+    column = y_pred[:, :1]
+    assert np.isclose(calculate_rmse(y_true[:, 0], column), np.sqrt(np.mean(errors[:, 0] ** 2)))
+    
+    with pytest.raises(ValueError):
+        calculate_rmse(y_true[:, 0], y_pred[:40, 0])
+
+
+def test_confidence_interval_coverage_of_empty_window_is_nan():
+    empty = np.array([])
+    
+    coverage = calculate_confidence_interval_coverage(empty, empty, empty)
+    
+    assert np.isnan(coverage['actual_coverage'])
+    assert np.isnan(coverage['avg_ci_width'])
+    assert coverage['num_samples'] == coverage['num_within_ci'] == 0
+
+
+def test_multi_horizon_short_circuits_empty_horizon():
+    empty = np.array([])
+    y_true = np.array([0.01, -0.02, 0.03])
+    y_pred = np.array([0.02, -0.01, 0.01])
+    
+    metrics = evaluate_multi_horizon(
+        {1: empty, 2: y_true},
+        {1: empty, 2: y_pred},
+        {1: (empty, empty), 2: (y_pred - 0.05, y_pred + 0.05)}
+    ).set_index('horizon')
+    
+    assert metrics.loc[1, 'num_samples'] == 0
+    assert metrics.loc[1, ['rmse', 'mae', 'directional_accuracy', 'actual_coverage']].isna().all()
+    assert metrics.loc[2, 'actual_coverage'] == 1.0
+
+
+def test_sharpe_ratio_keeps_series_and_array_std():
+    returns = pd.Series([0.01, np.nan, 0.02, -0.01, 0.005])
+    
+    expected_series = returns.mean() / returns.std() * np.sqrt(252)
+    values = returns.dropna().to_numpy()
+    expected_array = values.mean() / values.std() * np.sqrt(252)
+    
+    assert np.isclose(calculate_sharpe_ratio(returns), expected_series)
+    assert np.isclose(calculate_sharpe_ratio(values), expected_array)
+
+
+def test_position_changes_match_groupby_diff():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'symbol': rng.choice(['A', 'B', 'C', None], 200),
+        'signal': rng.choice([-1.0, 0.0, 1.0], 200)
+    })
+    
+    expected = df.groupby('symbol')['signal'].diff().abs().to_numpy()
+    result = Backtester._position_changes(df['symbol'], df['signal'])
+    
+    np.testing.assert_array_equal(result, expected)
+
+
+def test_numpy_splits_match_dataframe_splits():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'date': np.repeat(pd.bdate_range('2024-01-01', periods=30), 2),
+        'symbol': np.tile(['A', 'B'], 30),
+        'log_return': rng.normal(0, 0.02, 60),
+        'f0': rng.normal(size=60)
+    })
+    validator = WalkForwardValidator(initial_train_size=40, step_size=6, max_test_size=3)
+    
+    frame_splits = list(validator.create_splits(df))
+    array_splits = list(validator.iter_splits_np(df, ['f0'], horizons=[1]))
+    
+    assert len(array_splits) == len(frame_splits) == 3
+    for (train_df, test_df), (X_train, X_test, y_train, y_test) in zip(frame_splits, array_splits):
+        np.testing.assert_array_equal(X_train[:, 0], train_df['f0'].to_numpy(np.float32))
+        np.testing.assert_array_equal(X_test[:, 0], test_df['f0'].to_numpy(np.float32))
+        assert len(y_train[1]) == len(train_df) and len(y_test[1]) == len(test_df)